@@ -2,16 +2,34 @@
 Flask application factory.
 """
 import logging
+import orjson
 from flask import Flask
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 
 from app.config import Config
 from app.database import init_db
 
 
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider that serialises with orjson; ``jsonify`` uses it too."""
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 def create_app(config_class=Config):
     """Create and configure the Flask application."""
     app = Flask(__name__)
+    app.json = ORJSONProvider(app)
     app.config.from_object(config_class)
 
     # Enable CORS for all routes
@@ -0,0 +1,144 @@
+"""
+Shared Groq chat-completions client used by all analyzers.
+
+Responses are cached in the ``cached_llm_responses`` table, keyed by a hash of
+the full request payload, so re-analysing an unchanged business skips the
+model call entirely. Only replies the caller could parse are cached, so a
+truncated or malformed reply is requested again next time instead of being
+replayed.
+"""
+import hashlib
+import logging
+from datetime import datetime, timedelta
+
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import Config
+from app.database import new_session
+from app.models import LLMCacheEntry
+
+logger = logging.getLogger(__name__)
+
+GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+GROQ_MODEL = "llama-3.3-70b-versatile"
+
+# Shared session so calls reuse pooled keep-alive connections to Groq instead
+# of paying a new TCP+TLS handshake per request. Each in-flight business can
+# have two Groq calls open at once (grade + analysis).
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=2 * Config.ANALYZE_MAX_WORKERS))
+_SESSION.headers.update({"Content-Type": "application/json"})
+
+# Cached after the first non-empty read of app config
+_api_key = None
+
+
+def get_api_key():
+    """Return the configured GROQ_API_KEY ("" when unset)."""
+    global _api_key
+    if _api_key:
+        return _api_key
+
+    key = current_app.config.get("GROQ_API_KEY", "")
+    if key:
+        _api_key = key
+    return key
+
+
+def post_chat(messages, temperature, max_tokens, parse=None, cache_if=None, **options):
+    """
+    Send a chat completion request to Groq in JSON mode, so the reply is a
+    bare JSON object with no markdown wrapping.
+
+    *parse*, if given, is applied to the message content and its result
+    returned instead; exceptions it raises propagate and the reply is not
+    cached. *cache_if* can further restrict caching to parsed results it
+    accepts (e.g. batch replies that covered every item).
+
+    *options* are passed through in the payload (e.g. ``top_p``).
+    Returns the (parsed) message content, or None if the request failed.
+    """
+    payload = {
+        "model": GROQ_MODEL,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "response_format": {"type": "json_object"},
+        **options,
+    }
+    ttl = current_app.config.get("LLM_CACHE_TTL", 0)
+    cache_key = _cache_key(payload) if ttl else None
+
+    if cache_key:
+        cached = _cache_get(cache_key, ttl)
+        if cached is not None:
+            logger.debug("Groq cache hit: %s", cache_key)
+            if parse is None:
+                return cached
+            try:
+                return parse(cached)
+            except Exception as exc:
+                # Stored before replies were validated; fetch a fresh one
+                logger.warning("Discarding unparseable cached Groq reply: %s", exc)
+
+    headers = {"Authorization": f"Bearer {get_api_key()}"}
+
+    try:
+        response = _SESSION.post(GROQ_API_URL, headers=headers, data=orjson.dumps(payload), timeout=30)
+
+        if response.status_code != 200:
+            logger.error(f"Groq API error {response.status_code}: {response.text}")
+            return None
+
+        # orjson decodes the ~4KB envelope straight from bytes, skipping the
+        # charset detection and stdlib parse behind response.json()
+        content = orjson.loads(response.content)["choices"][0]["message"]["content"]
+
+    except requests.RequestException as exc:
+        logger.error("Groq API request failed: %s", exc)
+        return None
+    except (KeyError, IndexError, ValueError) as exc:
+        logger.error("Unexpected Groq API response: %s", exc)
+        return None
+
+    result = parse(content) if parse is not None else content
+    if cache_key and (cache_if is None or cache_if(result)):
+        _cache_set(cache_key, content)
+    return result
+
+
+def _cache_key(payload):
+    """Hash the request payload into a stable cache key."""
+    canonical = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(canonical).hexdigest()
+
+
+def _cache_get(key, ttl):
+    """Return the cached content for *key* if it is younger than *ttl* seconds."""
+    session = new_session()
+    try:
+        entry = session.get(LLMCacheEntry, key)
+        if entry and entry.created_at >= datetime.utcnow() - timedelta(seconds=ttl):
+            return entry.value
+    except SQLAlchemyError as exc:
+        logger.warning("Groq cache lookup failed: %s", exc)
+    finally:
+        session.close()
+    return None
+
+
+def _cache_set(key, content):
+    """Insert or replace the cached content for *key*."""
+    session = new_session()
+    try:
+        session.merge(LLMCacheEntry(key=key, value=content, created_at=datetime.utcnow()))
+        session.commit()
+    except SQLAlchemyError as exc:
+        logger.warning("Groq cache write failed: %s", exc)
+        session.rollback()
+    finally:
+        session.close()
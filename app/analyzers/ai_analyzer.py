@@ -1,15 +1,101 @@
 """
 AI-powered revenue and business analysis using the Groq API (free tier).
 """
-import json
+import orjson
 import logging
-import requests
-from flask import current_app
+from collections import defaultdict
+
+from app.analyzers._groq_client import get_api_key, post_chat
 
 logger = logging.getLogger(__name__)
 
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
-GROQ_MODEL = "llama-3.3-70b-versatile"
+# Businesses analysed per Groq request by analyze_businesses_batch, and the
+# completion budget allowed for each of them
+ANALYSIS_BATCH_SIZE = 5
+TOKENS_PER_ANALYSIS = 1000
+
+# Caps on what goes into the prompt. Input tokens drive both latency and
+# cost, and the tail of long lists doesn't change the analysis.
+MAX_SERVICES = 8
+MAX_PRICES = 8
+MAX_TEAM = 5
+MAX_FIELD_CHARS = 40
+
+_SYSTEM_PROMPT = (
+    "You are an expert business analyst specializing in local service businesses. "
+    "Analyze each business individually and provide varied, specific assessments. "
+    "Service quality scores should range from 3.0 to 9.5 based on actual indicators. "
+    "Provide detailed reasoning for your scores. "
+    "Always reply with a valid JSON object and nothing else."
+)
+
+
+# Prompt templates, filled with str.format_map from _prompt_context
+_BUSINESS_TEMPLATE = """Business: {name}
+Location: {location}
+Rating: {rating} ({reviews_count} reviews)
+Website: {website}
+Services: {services}
+Prices: {prices}
+Team: {team}
+Social: {ig_summary}"""
+
+_PROMPT_TEMPLATE = """Analyze this {niche} business SPECIFICALLY and INDIVIDUALLY. DO NOT give generic scores.
+
+""" + _BUSINESS_TEMPLATE + """
+
+CRITICAL INSTRUCTIONS:
+1. Service quality score should range from 3.0 to 9.5 based on actual indicators
+2. Consider: rating ({rating}), review count ({reviews_count}), team size, services offered, pricing shown, social presence
+3. Provide SPECIFIC reasoning referencing this business's data
+4. DO NOT default to scores like 7.5 or 8.0 for every business
+5. Low-quality indicators (low rating, no team, no prices) = 3.0-5.5
+6. Average indicators (decent rating, some info) = 6.0-7.5
+7. High-quality indicators (high rating, many reviews, full info) = 7.6-9.5
+
+Required JSON structure:
+{{
+  "revenue_streams": ["specific stream 1", "specific stream 2", "specific stream 3"],
+  "estimated_revenue_tier": "Low|Medium|High",
+  "pricing_strategy": "Budget|Mid-tier|Premium|Luxury",
+  "service_quality_score": 7.5,
+  "service_quality_reasoning": "Detailed explanation: This business has a {rating} rating with {reviews_count} reviews. {team_note}. {pricing_note}. Social presence: {ig_summary}. Based on these factors...",
+  "competitive_assessment": "Specific 2-3 sentence assessment referencing this business's actual data",
+  "niche_specific_insights": "Specific 2-3 sentence insight about THIS business in the {niche} niche"
+}}
+
+BE SPECIFIC. VARY YOUR SCORES. REFERENCE ACTUAL DATA."""
+
+_BATCH_PROMPT_TEMPLATE = """Analyze each of these {count} {niche} businesses SPECIFICALLY and INDIVIDUALLY. DO NOT give generic scores.
+
+{blocks}
+
+CRITICAL INSTRUCTIONS:
+1. Service quality score should range from 3.0 to 9.5 based on actual indicators
+2. Consider: rating, review count, team size, services offered, pricing shown, social presence
+3. Provide SPECIFIC reasoning referencing each business's own data
+4. DO NOT default to scores like 7.5 or 8.0 for every business
+5. Low-quality indicators (low rating, no team, no prices) = 3.0-5.5
+6. Average indicators (decent rating, some info) = 6.0-7.5
+7. High-quality indicators (high rating, many reviews, full info) = 7.6-9.5
+
+Required JSON structure, with exactly {count} entries in "analyses" in the same order as above:
+{{
+  "analyses": [
+    {{
+      "business_number": 1,
+      "revenue_streams": ["specific stream 1", "specific stream 2", "specific stream 3"],
+      "estimated_revenue_tier": "Low|Medium|High",
+      "pricing_strategy": "Budget|Mid-tier|Premium|Luxury",
+      "service_quality_score": 7.5,
+      "service_quality_reasoning": "Detailed explanation referencing this business's rating, reviews, team, pricing and social presence",
+      "competitive_assessment": "Specific 2-3 sentence assessment referencing this business's actual data",
+      "niche_specific_insights": "Specific 2-3 sentence insight about THIS business in the {niche} niche"
+    }}
+  ]
+}}
+
+BE SPECIFIC. VARY YOUR SCORES. REFERENCE ACTUAL DATA."""
 
 
 def analyze_business(business_data, niche):
@@ -21,142 +107,230 @@ def analyze_business(business_data, niche):
       service_quality_score, competitive_assessment, niche_specific_insights,
       opportunity_score
     """
-    api_key = current_app.config.get("GROQ_API_KEY", "")
-    
-    if not api_key:
+    if not get_api_key():
         logger.warning("GROQ_API_KEY is not set; skipping AI analysis.")
         return _empty_analysis()
 
+    # Nothing for the model to work from; it would only return generic output
+    if not _has_signal(business_data):
+        return _empty_analysis()
+
     prompt = _build_prompt(business_data, niche)
 
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-    payload = {
-        "model": GROQ_MODEL,
-        "messages": [
-            {
-                "role": "system",
-                "content": (
-                    "You are an expert business analyst specializing in local service businesses. "
-                    "Analyze each business individually and provide varied, specific assessments. "
-                    "Service quality scores should range from 3.0 to 9.5 based on actual indicators. "
-                    "Provide detailed reasoning for your scores. "
-                    "Always reply with a valid JSON object and nothing else."
-                ),
-            },
-            {"role": "user", "content": prompt},
-        ],
-        "temperature": 0.8,  # INCREASED from 0.3 for more variety
-        "max_tokens": 1500,  # INCREASED from 1024 for detailed reasoning
-    }
+    try:
+        # Parsed inside post_chat so only valid replies are cached
+        result = post_chat(
+            [
+                {"role": "system", "content": _SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.8,  # INCREASED from 0.3 for more variety
+            max_tokens=1500,  # INCREASED from 1024 for detailed reasoning
+            parse=_parse_analysis,
+        )
+    except (KeyError, IndexError, TypeError, ValueError, AttributeError) as exc:
+        logger.error("Failed to parse Groq API response: %s", exc)
+        return _empty_analysis()
+    if result is None:
+        return _empty_analysis()
+
+    logger.info(f"Groq API response received for {business_data.get('name', 'Unknown')}")
+
+    # Calculate and add opportunity score
+    result["opportunity_score"] = _calculate_opportunity_score(
+        business_data,
+        business_data.get("website_grade", {})
+    )
+
+    return result
+
+
+def analyze_businesses_batch(businesses, niche):
+    """
+    Analyse several businesses with one Groq request per ANALYSIS_BATCH_SIZE.
+
+    Returns a list of analysis dicts (same shape as analyze_business) aligned
+    with *businesses*. Businesses missing from a batch reply are retried
+    individually with analyze_business, and businesses with nothing to
+    analyse get an empty analysis without a request.
+    """
+    if not get_api_key():
+        logger.warning("GROQ_API_KEY is not set; skipping AI analysis.")
+        return [_empty_analysis() for _ in businesses]
+
+    analysable = [b for b in businesses if _has_signal(b)]
+    analysed = []
+    for start in range(0, len(analysable), ANALYSIS_BATCH_SIZE):
+        analysed.extend(_analyze_chunk(analysable[start:start + ANALYSIS_BATCH_SIZE], niche))
+
+    analysed = iter(analysed)
+    return [next(analysed) if _has_signal(b) else _empty_analysis() for b in businesses]
+
+
+def _analyze_chunk(businesses, niche):
+    """Analyse up to ANALYSIS_BATCH_SIZE businesses with a single Groq request."""
+    if len(businesses) == 1:
+        return [analyze_business(businesses[0], niche)]
 
     try:
-        response = requests.post(GROQ_API_URL, headers=headers, json=payload, timeout=30)
-        
-        # Add detailed error logging
-        if response.status_code != 200:
-            logger.error(f"Groq API error {response.status_code}: {response.text}")
-            return _empty_analysis()
-        
-        response.raise_for_status()
-        content = response.json()["choices"][0]["message"]["content"]
-        logger.info(f"Groq API response received for {business_data.get('name', 'Unknown')}")
-        
-        # Parse the analysis result
-        result = _parse_analysis(content)
-        
-        # Calculate and add opportunity score
-        opportunity_score = _calculate_opportunity_score(
-            business_data, 
+        # Incomplete replies aren't cached, so a rerun asks for the batch again
+        # rather than replaying the gaps
+        parsed = post_chat(
+            [
+                {"role": "system", "content": _SYSTEM_PROMPT},
+                {"role": "user", "content": _build_batch_prompt(businesses, niche)},
+            ],
+            temperature=0.8,
+            max_tokens=TOKENS_PER_ANALYSIS * len(businesses),
+            parse=lambda content: _parse_analyses(content, len(businesses)),
+            cache_if=lambda parsed: None not in parsed,
+        )
+    except (KeyError, IndexError, TypeError, ValueError) as exc:
+        logger.error("Failed to parse Groq API batch response: %s", exc)
+        parsed = [None] * len(businesses)
+    else:
+        if parsed is None:
+            return [_empty_analysis() for _ in businesses]
+        logger.info(f"Groq API batch response received for {len(businesses)} businesses")
+
+    results = []
+    for business_data, result in zip(businesses, parsed):
+        if result is None:
+            logger.warning(f"Batch reply missing {business_data.get('name', 'Unknown')}; retrying alone")
+            # One failed retry mustn't discard the rest of the chunk
+            try:
+                results.append(analyze_business(business_data, niche))
+            except Exception as exc:
+                logger.error(f"AI analysis failed for {business_data.get('name', 'Unknown')}: {exc}")
+                results.append(_empty_analysis())
+            continue
+        result["opportunity_score"] = _calculate_opportunity_score(
+            business_data,
             business_data.get("website_grade", {})
         )
-        result["opportunity_score"] = opportunity_score
-        
-        return result
-        
-    except requests.RequestException as exc:
-        logger.error("Groq API request failed: %s", exc)
-    except (KeyError, IndexError, json.JSONDecodeError) as exc:
-        logger.error("Failed to parse Groq API response: %s", exc)
+        results.append(result)
+    return results
 
-    return _empty_analysis()
 
+def _has_signal(business_data):
+    """True if the business has any scraped data worth sending to the model."""
+    return any([
+        business_data.get("services"),
+        business_data.get("prices"),
+        business_data.get("website"),
+        (business_data.get("instagram") or {}).get("username"),
+    ])
 
-def _build_prompt(data, niche):
-    """Build the analysis prompt from scraped data."""
-    
+
+def _format_fields(data):
+    """Render the list-like business fields into prompt-ready strings."""
     # Handle services
-    services = ", ".join(data.get("services", [])[:10]) or "unknown"
+    services = ", ".join(s[:MAX_FIELD_CHARS] for s in data.get("services", [])[:MAX_SERVICES]) or "unknown"
     
     # Handle prices - support both dict and string format
     price_list = data.get("prices", [])
     if price_list and isinstance(price_list[0], dict):
-        prices = ", ".join([p.get("price", "") for p in price_list[:10]]) or "unknown"
+        prices = ", ".join([p.get("price", "") for p in price_list[:MAX_PRICES]]) or "unknown"
     elif price_list:
-        prices = ", ".join([str(p) for p in price_list[:10]]) or "unknown"
+        prices = ", ".join([str(p) for p in price_list[:MAX_PRICES]]) or "unknown"
     else:
         prices = "unknown"
     
     # Handle team members
-    team = ", ".join(data.get("team_members", [])[:10]) or "unknown"
+    team = ", ".join(t[:MAX_FIELD_CHARS] for t in data.get("team_members", [])[:MAX_TEAM]) or "unknown"
 
     ig = data.get("instagram") or {}
     ig_summary = (
         f"Instagram: @{ig.get('username')} | "
-        f"{ig.get('followers', 0):,} followers | "
+        f"{_follower_bucket(ig.get('followers') or 0)} followers | "
         f"{ig.get('engagement_rate', 0):.1f}% engagement"
         if ig.get("username")
         else "No Instagram found"
     )
+    return services, prices, team, ig_summary
 
-    return f"""Analyze this {niche} business SPECIFICALLY and INDIVIDUALLY. DO NOT give generic scores.
 
-Business: {data.get('name', 'Unknown')}
-Location: {data.get('location', 'Unknown')}
-Rating: {data.get('rating', 'N/A')} ({data.get('reviews_count', 0)} reviews)
-Website: {data.get('website', 'None')}
-Services: {services}
-Prices: {prices}
-Team: {team}
-Social: {ig_summary}
+def _follower_bucket(followers):
+    """Coarse follower band; the exact count doesn't change the analysis."""
+    for threshold, label in ((1_000_000, "1M+"), (100_000, "100k+"), (10_000, "10k+"), (1_000, "1k+")):
+        if followers >= threshold:
+            return label
+    return "<1k"
 
-CRITICAL INSTRUCTIONS:
-1. Service quality score should range from 3.0 to 9.5 based on actual indicators
-2. Consider: rating ({data.get('rating')}), review count ({data.get('reviews_count')}), team size, services offered, pricing shown, social presence
-3. Provide SPECIFIC reasoning referencing this business's data
-4. DO NOT default to scores like 7.5 or 8.0 for every business
-5. Low-quality indicators (low rating, no team, no prices) = 3.0-5.5
-6. Average indicators (decent rating, some info) = 6.0-7.5
-7. High-quality indicators (high rating, many reviews, full info) = 7.6-9.5
 
-Required JSON structure:
-{{
-  "revenue_streams": ["specific stream 1", "specific stream 2", "specific stream 3"],
-  "estimated_revenue_tier": "Low|Medium|High",
-  "pricing_strategy": "Budget|Mid-tier|Premium|Luxury",
-  "service_quality_score": 7.5,
-  "service_quality_reasoning": "Detailed explanation: This business has a {data.get('rating')} rating with {data.get('reviews_count')} reviews. {'Team of ' + str(len(data.get('team_members', []))) + ' shown' if data.get('team_members') else 'No team information'}. {'Pricing shown' if prices != 'unknown' else 'No pricing transparency'}. Social presence: {ig_summary}. Based on these factors...",
-  "competitive_assessment": "Specific 2-3 sentence assessment referencing this business's actual data",
-  "niche_specific_insights": "Specific 2-3 sentence insight about THIS business in the {niche} niche"
-}}
+def _prompt_context(data, niche):
+    """
+    Build the format_map context for one business. Fields the template needs
+    but the business lacks render as "Unknown".
+    """
+    services, prices, team, ig_summary = _format_fields(data)
+    team_members = data.get("team_members") or []
 
-BE SPECIFIC. VARY YOUR SCORES. REFERENCE ACTUAL DATA."""
+    ctx = defaultdict(lambda: "Unknown", data)
+    ctx.setdefault("rating", "N/A")
+    ctx.setdefault("reviews_count", 0)
+    ctx.setdefault("website", "None")
+    ctx.update(
+        niche=niche,
+        services=services,
+        prices=prices,
+        team=team,
+        ig_summary=ig_summary,
+        team_note=f"Team of {len(team_members)} shown" if team_members else "No team information",
+        pricing_note="Pricing shown" if prices != "unknown" else "No pricing transparency",
+    )
+    return ctx
+
+
+def _build_prompt(data, niche):
+    """Build the analysis prompt from scraped data."""
+    return _PROMPT_TEMPLATE.format_map(_prompt_context(data, niche))
+
+
+def _build_batch_prompt(businesses, niche):
+    """Build one prompt asking for an analysis of every business in *businesses*."""
+    blocks = [
+        f"BUSINESS {number}\n" + _BUSINESS_TEMPLATE.format_map(_prompt_context(data, niche))
+        for number, data in enumerate(businesses, start=1)
+    ]
+    return _BATCH_PROMPT_TEMPLATE.format(
+        count=len(businesses),
+        niche=niche,
+        blocks="\n".join(blocks),
+    )
 
 
 def _parse_analysis(content):
     """Extract and validate a JSON analysis from the model response."""
-    # Strip markdown code fences if present
-    content = content.strip()
-    if content.startswith("```"):
-        lines = content.splitlines()
-        content = "\n".join(
-            line for line in lines if not line.startswith("```")
-        ).strip()
+    return _normalize_analysis(orjson.loads(content))
+
+
+def _parse_analyses(content, count):
+    """
+    Extract *count* analyses from a batch response.
+
+    Returns a list aligned with the prompt order; entries the model left out
+    or that don't fit the analysis shape are None.
+    """
+    data = orjson.loads(content)
+    items = data.get("analyses", []) if isinstance(data, dict) else data
+
+    parsed = [None] * count
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        number = item.get("business_number")
+        index = number - 1 if isinstance(number, int) else position
+        if 0 <= index < count and parsed[index] is None:
+            try:
+                parsed[index] = _normalize_analysis(item)
+            except (TypeError, ValueError) as exc:
+                logger.warning("Skipping malformed analysis for business %d: %s", index + 1, exc)
+    return parsed
 
-    data = json.loads(content)
 
+def _normalize_analysis(data):
+    """Coerce a raw analysis object into the shape returned by analyze_business."""
     return {
         "revenue_streams": data.get("revenue_streams", []),
         "estimated_revenue_tier": data.get("estimated_revenue_tier", "Unknown"),
@@ -4,15 +4,12 @@ AI-powered brand audit using the Groq API.
 Generates concise brand summaries, positioning guesses, conversion notes,
 and prioritised recommendations from scraped website data.
 """
-import json
+import orjson
 import logging
-import requests
-from flask import current_app
 
-logger = logging.getLogger(__name__)
+from app.analyzers._groq_client import get_api_key, post_chat
 
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
-GROQ_MODEL = "llama-3.3-70b-versatile"
+logger = logging.getLogger(__name__)
 
 
 def generate_brand_audit(website_data: dict, brand_info: dict) -> dict:
@@ -28,53 +25,39 @@ def generate_brand_audit(website_data: dict, brand_info: dict) -> dict:
           "top_recommendations": [...]    # 3-6 prioritised actions with "because…"
         }
     """
-    api_key = current_app.config.get("GROQ_API_KEY", "")
-    if not api_key:
+    if not get_api_key():
         logger.warning("GROQ_API_KEY not set; skipping brand audit.")
         return _empty_audit()
 
     prompt = _build_prompt(website_data, brand_info)
 
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-    payload = {
-        "model": GROQ_MODEL,
-        "messages": [
-            {
-                "role": "system",
-                "content": (
-                    "You are an elite brand strategist and conversion rate optimiser. "
-                    "You analyse websites and produce concise, evidence-based brand audits. "
-                    "Your bullets are specific – they always reference actual data from the "
-                    "website (CTAs found, pricing shown, team listed, images count, etc.). "
-                    "Never produce generic advice. "
-                    "Reply with valid JSON only – no markdown, no extra text."
-                ),
-            },
-            {"role": "user", "content": prompt},
-        ],
-        "temperature": 0.7,
-        "max_tokens": 2000,
-        "top_p": 0.9,
-    }
-
     try:
-        response = requests.post(GROQ_API_URL, headers=headers, json=payload, timeout=30)
-        if response.status_code != 200:
-            logger.error("Groq API error %s: %s", response.status_code, response.text)
-            return _empty_audit()
-        response.raise_for_status()
-        content = response.json()["choices"][0]["message"]["content"]
-        return _parse_audit(content)
-
-    except requests.RequestException as exc:
-        logger.error("Groq API request failed for brand audit: %s", exc)
-    except (KeyError, IndexError, json.JSONDecodeError) as exc:
+        # Parsed inside post_chat so only valid replies are cached
+        audit = post_chat(
+            [
+                {
+                    "role": "system",
+                    "content": (
+                        "You are an elite brand strategist and conversion rate optimiser. "
+                        "You analyse websites and produce concise, evidence-based brand audits. "
+                        "Your bullets are specific – they always reference actual data from the "
+                        "website (CTAs found, pricing shown, team listed, images count, etc.). "
+                        "Never produce generic advice. "
+                        "Reply with valid JSON only – no markdown, no extra text."
+                    ),
+                },
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.7,
+            max_tokens=2000,
+            top_p=0.9,
+            parse=_parse_audit,
+        )
+    except (KeyError, IndexError, orjson.JSONDecodeError) as exc:
         logger.error("Failed to parse brand audit response: %s", exc)
+        return _empty_audit()
 
-    return _empty_audit()
+    return audit if audit is not None else _empty_audit()
 
 
 def _build_prompt(website_data: dict, brand_info: dict) -> str:
@@ -164,12 +147,7 @@ Be specific, be harsh where needed, and always tie every bullet to the evidence
 
 
 def _parse_audit(content: str) -> dict:
-    content = content.strip()
-    if content.startswith("```"):
-        lines = content.splitlines()
-        content = "\n".join(l for l in lines if not l.startswith("```")).strip()
-
-    data = json.loads(content)
+    data = orjson.loads(content)
     return {
         "brand_summary": data.get("brand_summary", []),
         "positioning_guess": data.get("positioning_guess", ""),
@@ -2,15 +2,37 @@
 Universal website grading system for local service businesses.
 Grades websites out of 100 points based on graded criteria.
 """
-import json
+import orjson
 import logging
-import requests
-from flask import current_app
+
+from app.analyzers._groq_client import get_api_key, post_chat
 
 logger = logging.getLogger(__name__)
 
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
-GROQ_MODEL = "llama-3.3-70b-versatile"
+# Websites graded per Groq request by grade_websites_batch, and the completion
+# budget allowed for each of them (a rubric grade is a large JSON object)
+GRADE_BATCH_SIZE = 3
+TOKENS_PER_GRADE = 1500
+
+_SYSTEM_PROMPT = (
+    "You are a brutally honest website conversion expert who grades local service business websites. "
+    "You have personally audited over 10,000 websites and know exactly what converts and what doesn't. "
+    "\n\n"
+    "CRITICAL RULES:\n"
+    "1. Scores MUST range from 25-92. Never give a score between 55-65 unless truly average.\n"
+    "2. Most websites are either bad (30-50) or decent (70-85). Very few are perfect (85+).\n"
+    "3. Missing prices = automatic -15 points from conversion score.\n"
+    "4. No team photos = automatic -10 points from trust score.\n"
+    "5. No social proof/testimonials = automatic -12 points.\n"
+    "6. HTTP only (no SSL) = automatic score below 35 maximum.\n"
+    "7. Missing mobile viewport = automatic score below 40 maximum.\n"
+    "8. Every website is DIFFERENT. No two sites should score within 3 points of each other.\n"
+    "9. Be SPECIFIC about what's good and bad. Generic feedback is worthless.\n"
+    "10. Your reasoning should reference actual data from the website, not assumptions.\n"
+    "\n"
+    "Think like a customer: Would YOU hire this business based on their website alone?\n"
+    "Always reply with valid JSON only."
+)
 
 
 def grade_website(website_data):
@@ -26,73 +48,206 @@ def grade_website(website_data):
       - recommendations: list
       - detailed_breakdown: dict with individual category scores AND reasoning
     """
-    api_key = current_app.config.get("GROQ_API_KEY", "")
-    
-    if not api_key:
+    if not get_api_key():
         logger.warning("GROQ_API_KEY is not set; skipping website grading.")
         return _empty_grade()
     
-    # If no website data, return 0
-    if not website_data or not website_data.get("url"):
+    # If no website data, or a page with no content to judge, return 0
+    if not _is_gradable(website_data):
         return _empty_grade()
     
     prompt = _build_grading_prompt(website_data)
     
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-    
-    payload = {
-        "model": GROQ_MODEL,
-        "messages": [
-            {
-                "role": "system",
-                "content": (
-                    "You are a brutally honest website conversion expert who grades local service business websites. "
-                    "You have personally audited over 10,000 websites and know exactly what converts and what doesn't. "
-                    "\n\n"
-                    "CRITICAL RULES:\n"
-                    "1. Scores MUST range from 25-92. Never give a score between 55-65 unless truly average.\n"
-                    "2. Most websites are either bad (30-50) or decent (70-85). Very few are perfect (85+).\n"
-                    "3. Missing prices = automatic -15 points from conversion score.\n"
-                    "4. No team photos = automatic -10 points from trust score.\n"
-                    "5. No social proof/testimonials = automatic -12 points.\n"
-                    "6. HTTP only (no SSL) = automatic score below 35 maximum.\n"
-                    "7. Missing mobile viewport = automatic score below 40 maximum.\n"
-                    "8. Every website is DIFFERENT. No two sites should score within 3 points of each other.\n"
-                    "9. Be SPECIFIC about what's good and bad. Generic feedback is worthless.\n"
-                    "10. Your reasoning should reference actual data from the website, not assumptions.\n"
-                    "\n"
-                    "Think like a customer: Would YOU hire this business based on their website alone?\n"
-                    "Always reply with valid JSON only."
-                ),
-            },
-            {"role": "user", "content": prompt},
-        ],
-        "temperature": 0.25,  # HIGH temperature for maximum variety
-        "max_tokens": 1500,
-        "top_p": 1.0,  # Added for more diverse outputs
-    }
-    
     try:
-        response = requests.post(GROQ_API_URL, headers=headers, json=payload, timeout=30)
-        
-        if response.status_code != 200:
-            logger.error(f"Groq API error {response.status_code}: {response.text}")
-            return _empty_grade()
-        
-        response.raise_for_status()
-        content = response.json()["choices"][0]["message"]["content"]
-        logger.info(f"Website grade generated for {website_data.get('url', 'Unknown')}")
-        return _parse_grade(content)
-        
-    except requests.RequestException as exc:
-        logger.error("Groq API request failed for website grading: %s", exc)
-    except (KeyError, IndexError, json.JSONDecodeError) as exc:
+        # Parsed inside post_chat so only valid replies are cached
+        grade = post_chat(
+            [
+                {"role": "system", "content": _SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.25,  # HIGH temperature for maximum variety
+            max_tokens=1500,
+            top_p=1.0,  # Added for more diverse outputs
+            parse=_parse_grade,
+        )
+    except (KeyError, IndexError, TypeError, ValueError, AttributeError) as exc:
         logger.error("Failed to parse website grade response: %s", exc)
+        return _empty_grade()
+    if grade is None:
+        return _empty_grade()
     
-    return _empty_grade()
+    logger.info(f"Website grade generated for {website_data.get('url', 'Unknown')}")
+    return grade
+
+
+def grade_websites_batch(websites):
+    """
+    Grade several websites with one Groq request per GRADE_BATCH_SIZE.
+
+    Returns a list of grade dicts (same shape as grade_website) aligned with
+    *websites*. Websites missing from a batch reply are retried individually
+    with grade_website.
+    """
+    if not get_api_key():
+        logger.warning("GROQ_API_KEY is not set; skipping website grading.")
+        return [_empty_grade() for _ in websites]
+
+    results = []
+    for start in range(0, len(websites), GRADE_BATCH_SIZE):
+        results.extend(_grade_chunk(websites[start:start + GRADE_BATCH_SIZE]))
+    return results
+
+
+def _grade_chunk(websites):
+    """Grade up to GRADE_BATCH_SIZE websites with a single Groq request."""
+    gradable = [w for w in websites if _is_gradable(w)]
+    if len(gradable) <= 1:
+        return [grade_website(w) for w in websites]
+
+    try:
+        # Incomplete replies aren't cached, so a rerun asks for the batch again
+        # rather than replaying the gaps
+        parsed = post_chat(
+            [
+                {"role": "system", "content": _SYSTEM_PROMPT},
+                {"role": "user", "content": _build_batch_grading_prompt(gradable)},
+            ],
+            temperature=0.25,
+            max_tokens=TOKENS_PER_GRADE * len(gradable),
+            top_p=1.0,
+            parse=lambda content: _parse_grades(content, len(gradable)),
+            cache_if=lambda parsed: None not in parsed,
+        )
+    except (KeyError, IndexError, TypeError, ValueError, AttributeError) as exc:
+        logger.error("Failed to parse batch website grade response: %s", exc)
+        parsed = [None] * len(gradable)
+    else:
+        if parsed is None:
+            return [_empty_grade() for _ in websites]
+        logger.info(f"Website grades generated for {len(gradable)} sites in one batch")
+
+    graded = iter(zip(gradable, parsed))
+    results = []
+    for website_data in websites:
+        if not _is_gradable(website_data):
+            results.append(_empty_grade())
+            continue
+        website_data, grade = next(graded)
+        if grade is None:
+            logger.warning(f"Batch reply missing {website_data.get('url')}; grading it alone")
+            # One failed retry mustn't discard the rest of the chunk
+            try:
+                grade = grade_website(website_data)
+            except Exception as exc:
+                logger.error(f"Website grading failed for {website_data.get('url')}: {exc}")
+                grade = _empty_grade()
+        results.append(grade)
+    return results
+
+
+def _is_gradable(website_data):
+    """
+    True if the scrape produced a page worth grading. Pages with no title, no
+    headings and almost no text (blocked, parked or failed to render) would
+    only get a generic low grade from the model.
+    """
+    if not website_data or not website_data.get("url"):
+        return False
+    return bool(
+        website_data.get("meta_title")
+        or website_data.get("h1_tags")
+        or (website_data.get("text_length") or 0) >= 100
+    )
+
+
+_BAR = "━" * 54
+
+_PROMPT_INTRO = """
+You are grading a local service business website using a WEBSITE-ONLY rubric.
+You must ONLY score items you can verify from the raw data below.
+If something cannot be verified from the data, score it conservatively (0 or 1) and say what evidence is missing.
+
+SCORING:
+- 20 items, each scored 0/1/2 => total_points 0–40
+- total_score (0–100) = round((total_points / 40) * 100)
+
+OUTPUT:
+- Return VALID JSON only, matching the required output shape.
+- Include item-level evidence tied to the raw data below (CTA text, meta title, counts, etc.).
+- Do not mention ad accounts, tracking, bidding, or campaign setup (not website-gradable).
+""".strip()
+
+_RUBRIC = """
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+RUBRIC (website-only) — total 40 points
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+Section A — Conversion & Offer Clarity (max 12)
+A1. Primary CTA obvious above the fold (0–2)
+A2. Appointment path frictionless (0–2)
+A3. Front-end offer clearly stated (0–2)
+A4. Service pages optimized for conversion intent (0–2)
+A5. Objection handling present (0–2)
+A6. Message consistency across site (0–2)
+
+Section B — Trust & Authority (max 10)
+B1. Provider credibility visible (0–2)
+B2. Reviews/testimonials present and credible (0–2)
+B3. Results proof (before/after/outcomes) where appropriate (0–2)
+B4. Risk reducers/transparency (0–2)
+B5. Policies/compliance basics (0–2)
+
+Section C — Local SEO & Content Structure (max 10)
+C1. Topical + location targeting exists (0–2)
+C2. Dedicated service pages exist for core services (0–2)
+C3. Internal linking between services is intentional (0–2)
+C4. Schema markup present and relevant (0–2)
+C5. NAP consistency + contact clarity (0–2)
+
+Section D — Technical & UX Fundamentals (max 8)
+D1. Mobile readiness (0–2)
+D2. Page-speed hygiene (0–2)
+D3. Accessibility basics (0–2)
+D4. Contactability everywhere (0–2)
+""".strip()
+
+_OUTPUT_SHAPE = """
+{
+  "total_points": 0,
+  "max_points": 40,
+  "total_score": 0,
+  "sections": {
+    "conversion_offer_clarity": {
+      "score": 0, "max": 12,
+      "items": [
+        {"id":"A1","label":"Primary CTA obvious above the fold","score":0,"max":2,"evidence":"..."}
+      ]
+    },
+    "trust_authority": { "score": 0, "max": 10, "items": [] },
+    "local_seo_structure": { "score": 0, "max": 10, "items": [] },
+    "technical_ux": { "score": 0, "max": 8, "items": [] }
+  },
+  "strengths": ["..."],
+  "weaknesses": ["..."],
+  "recommendations": ["..."]
+}
+""".strip()
+
+
+# Everything in the single-site prompt except the site's own facts, built
+# once at import
+_GRADING_PROMPT_HEAD = f"{_PROMPT_INTRO}\n\n{_BAR}\nWEBSITE\n{_BAR}\n"
+_GRADING_PROMPT_TAIL = f"""
+
+{_RUBRIC}
+
+{_BAR}
+REQUIRED OUTPUT JSON SHAPE (JSON ONLY)
+{_BAR}
+
+{_OUTPUT_SHAPE}
+
+Now grade the website strictly using only the raw data. Output JSON only."""
 
 
 def _build_grading_prompt(data):
@@ -100,6 +255,40 @@ def _build_grading_prompt(data):
     Website-only grading prompt using a 20-item rubric (0/1/2 each) => 0–40 points,
     scaled to 0–100 for total_score.
     """
+    return _GRADING_PROMPT_HEAD + _website_facts(data) + _GRADING_PROMPT_TAIL
+
+
+def _build_batch_grading_prompt(websites):
+    """Grading prompt covering several websites, answered as one ``grades`` array."""
+    count = len(websites)
+    sections = "\n\n".join(
+        f"{_BAR}\nWEBSITE {number}\n{_BAR}\n{_website_facts(data)}"
+        for number, data in enumerate(websites, start=1)
+    )
+    return f"""
+{_PROMPT_INTRO}
+
+There are {count} websites below. Grade each one independently, using only its own raw data.
+
+{sections}
+
+{_RUBRIC}
+
+{_BAR}
+REQUIRED OUTPUT JSON SHAPE (JSON ONLY)
+{_BAR}
+
+Return {{"grades": [...]}} with exactly {count} objects, in the same order as the websites above.
+Each object has "website_number" (1–{count}) plus this shape:
+
+{_OUTPUT_SHAPE}
+
+Now grade every website strictly using only its own raw data. Output JSON only.
+""".strip()
+
+
+def _website_facts(data):
+    """Render the detected issues, signals and raw data for one website."""
 
     def _safe_str(x, default=""):
         return default if x is None else str(x)
@@ -107,7 +296,7 @@ def _build_grading_prompt(data):
     url = (_safe_str(data.get("url"), "Unknown") or "Unknown").strip()
     has_ssl = url.lower().startswith("https://")
 
-    meta_title = _safe_str(data.get("meta_title"), "Missing")
+    meta_title = _safe_str(data.get("meta_title"), "Missing")[:80]
     meta_desc = _safe_str(data.get("meta_description"), "Missing")
 
     h1_tags = data.get("h1_tags") or []
@@ -175,22 +364,6 @@ def _build_grading_prompt(data):
         positive_signals.append(f"✅ Schema detected ({', '.join([_safe_str(t) for t in schema_types[:5]])})")
 
     return f"""
-You are grading a local service business website using a WEBSITE-ONLY rubric.
-You must ONLY score items you can verify from the raw data below.
-If something cannot be verified from the data, score it conservatively (0 or 1) and say what evidence is missing.
-
-SCORING:
-- 20 items, each scored 0/1/2 => total_points 0–40
-- total_score (0–100) = round((total_points / 40) * 100)
-
-OUTPUT:
-- Return VALID JSON only, matching the required output shape.
-- Include item-level evidence tied to the raw data below (CTA text, meta title, counts, etc.).
-- Do not mention ad accounts, tracking, bidding, or campaign setup (not website-gradable).
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-WEBSITE
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 URL: {url}
 
 CRITICAL ISSUES (detected):
@@ -207,88 +380,52 @@ TECHNICAL:
 - Mobile viewport: {"Yes" if has_mobile_viewport else "No"}
 - Meta title: "{meta_title}"
 - Meta description: {"Present" if meta_desc != "Missing" and meta_desc.strip() else "Missing"}
-- H1 tags count: {len(h1_tags)} (sample: {", ".join([f'"{_safe_str(h)}"' for h in h1_tags[:2]]) if h1_tags else "None"})
+- H1 tags count: {len(h1_tags)}
 - Images: {images_count} (with alt: {images_with_alt}, {alt_text_percentage}%)
 - Links count: {len(links)}
 
 CONVERSION / CONTENT SIGNALS:
-- CTA buttons ({len(cta_buttons)}): {", ".join([f'"{_safe_str(c)}"' for c in cta_buttons[:6]]) if cta_buttons else "None"}
-- Services extracted ({len(services)}): {", ".join([f'"{_safe_str(s)}"' for s in services[:8]]) if services else "None"}
+- CTA buttons ({len(cta_buttons)}): {", ".join([f'"{_safe_str(c)[:40]}"' for c in cta_buttons[:6]]) if cta_buttons else "None"}
+- Services extracted ({len(services)}): {", ".join([f'"{_safe_str(s)[:40]}"' for s in services[:8]]) if services else "None"}
 - Pricing extracted ({len(prices)}): {"Present" if has_pricing else "Not detected"}
 - Team/provider extracted ({len(team_members)}): {"Present" if has_team else "Not detected"}
 - Content length: {text_length} characters
 - Schema types: {", ".join([_safe_str(t) for t in schema_types[:6]]) if schema_types else "None detected"}
 - Local intent heuristic: {"Yes" if has_local_intent else "No/unclear"}
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-RUBRIC (website-only) — total 40 points
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-Section A — Conversion & Offer Clarity (max 12)
-A1. Primary CTA obvious above the fold (0–2)
-A2. Appointment path frictionless (0–2)
-A3. Front-end offer clearly stated (0–2)
-A4. Service pages optimized for conversion intent (0–2)
-A5. Objection handling present (0–2)
-A6. Message consistency across site (0–2)
-
-Section B — Trust & Authority (max 10)
-B1. Provider credibility visible (0–2)
-B2. Reviews/testimonials present and credible (0–2)
-B3. Results proof (before/after/outcomes) where appropriate (0–2)
-B4. Risk reducers/transparency (0–2)
-B5. Policies/compliance basics (0–2)
-
-Section C — Local SEO & Content Structure (max 10)
-C1. Topical + location targeting exists (0–2)
-C2. Dedicated service pages exist for core services (0–2)
-C3. Internal linking between services is intentional (0–2)
-C4. Schema markup present and relevant (0–2)
-C5. NAP consistency + contact clarity (0–2)
-
-Section D — Technical & UX Fundamentals (max 8)
-D1. Mobile readiness (0–2)
-D2. Page-speed hygiene (0–2)
-D3. Accessibility basics (0–2)
-D4. Contactability everywhere (0–2)
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-REQUIRED OUTPUT JSON SHAPE (JSON ONLY)
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-{{
-  "total_points": 0,
-  "max_points": 40,
-  "total_score": 0,
-  "sections": {{
-    "conversion_offer_clarity": {{
-      "score": 0, "max": 12,
-      "items": [
-        {{"id":"A1","label":"Primary CTA obvious above the fold","score":0,"max":2,"evidence":"..."}}
-      ]
-    }},
-    "trust_authority": {{ "score": 0, "max": 10, "items": [] }},
-    "local_seo_structure": {{ "score": 0, "max": 10, "items": [] }},
-    "technical_ux": {{ "score": 0, "max": 8, "items": [] }}
-  }},
-  "strengths": ["..."],
-  "weaknesses": ["..."],
-  "recommendations": ["..."]
-}}
-
-Now grade the website strictly using only the raw data. Output JSON only.
 """.strip()
 
 
 def _parse_grade(content):
     """Parse and validate grade response from AI. Supports new rubric schema and old schema."""
-    content = content.strip()
-    if content.startswith("```"):
-        lines = content.splitlines()
-        content = "\n".join(line for line in lines if not line.startswith("```")).strip()
+    return _normalize_grade(orjson.loads(content))
 
-    data = json.loads(content)
 
+def _parse_grades(content, count):
+    """
+    Extract *count* grades from a batch response.
+
+    Returns a list aligned with the prompt order; entries the model left out
+    or that don't fit the grade shape are None.
+    """
+    data = orjson.loads(content)
+    items = data.get("grades", []) if isinstance(data, dict) else data
+
+    parsed = [None] * count
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        number = item.get("website_number")
+        index = number - 1 if isinstance(number, int) else position
+        if 0 <= index < count and parsed[index] is None:
+            try:
+                parsed[index] = _normalize_grade(item)
+            except (TypeError, ValueError, AttributeError) as exc:
+                logger.warning("Skipping malformed grade for website %d: %s", index + 1, exc)
+    return parsed
+
+
+def _normalize_grade(data):
+    """Coerce a raw grade object (new rubric or old schema) into the grade dict shape."""
     # New rubric schema
     if "sections" in data and "total_points" in data:
         total_points = int(data.get("total_points") or 0)
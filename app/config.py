@@ -17,3 +17,9 @@ class Config:
     GROQ_API_KEY = os.environ.get("GROQ_API_KEY", "")
     FLASK_ENV = os.environ.get("FLASK_ENV", "development")
     DEBUG = os.environ.get("FLASK_DEBUG", "False").lower() in ("true", "1", "yes")
+    # Businesses processed concurrently per analysis (also sizes the Groq pool)
+    ANALYZE_MAX_WORKERS = int(os.environ.get("ANALYZE_MAX_WORKERS", 8))
+    # How long cached Groq responses are reused, in seconds (0 disables the cache)
+    LLM_CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", 7 * 24 * 3600))
+    # Headless Chromium instances kept running for the scrapers
+    BROWSER_POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", 4))
@@ -1,8 +1,10 @@
 """
 Database initialisation and session management.
 """
-from sqlalchemy import create_engine
+import orjson
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import scoped_session, sessionmaker, DeclarativeBase
+from sqlalchemy.pool import StaticPool
 
 
 class Base(DeclarativeBase):
@@ -18,10 +20,34 @@ def init_db(flask_app):
     global _engine, _Session
 
     database_url = flask_app.config["SQLALCHEMY_DATABASE_URI"]
+    is_sqlite = database_url.startswith("sqlite")
+
+    if is_sqlite:
+        engine_options = {"connect_args": {"check_same_thread": False}}
+        # An in-memory database only exists on its own connection, so every
+        # thread has to share it. File databases keep the default pool: one
+        # sqlite3 connection can't be used from several threads at once.
+        if ":memory:" in database_url or database_url in ("sqlite://", "sqlite:///"):
+            engine_options["poolclass"] = StaticPool
+    else:
+        # Background jobs, the scrape pool and the LLM cache all hold
+        # connections at once, so allow more than the default 5+10, and
+        # drop connections the server may have closed while idle.
+        engine_options = {
+            "pool_size": 10,
+            "max_overflow": 20,
+            "pool_pre_ping": True,
+            "pool_recycle": 1800,
+        }
+
     _engine = create_engine(
         database_url,
-        connect_args={"check_same_thread": False} if database_url.startswith("sqlite") else {},
+        json_serializer=lambda obj: orjson.dumps(obj).decode(),
+        json_deserializer=orjson.loads,
+        **engine_options,
     )
+    if is_sqlite:
+        event.listen(_engine, "connect", _set_sqlite_pragmas)
     _Session = scoped_session(sessionmaker(bind=_engine))
 
     # Import models so that their tables are registered on Base.metadata
@@ -35,6 +61,24 @@ def init_db(flask_app):
             _Session.remove()
 
 
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Use WAL journaling so writes don't fsync on every commit or block readers,
+    with a 64 MB page cache and in-memory temp tables.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA cache_size=-64000")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
 def get_session():
     """Return the current scoped session."""
     return _Session()
+
+
+def new_session():
+    """Return a standalone session that is not bound to the thread-local scope."""
+    return _Session.session_factory()
@@ -1,9 +1,9 @@
 """
 SQLAlchemy ORM models.
 """
-import json
+import orjson
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Boolean, JSON, Index
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -11,6 +11,9 @@ from app.database import Base
 
 class Business(Base):
     __tablename__ = "businesses"
+    __table_args__ = (
+        Index("ix_businesses_niche_location", "niche", "location"),
+    )
 
     id = Column(Integer, primary_key=True)
     job_id = Column(String(50), index=True)  # NEW
@@ -28,19 +31,22 @@ class Business(Base):
     website_grade_score = Column(Float)   # cached total_score from website grader
     website_grade = Column(Text)          # full website grade as JSON string
     
+    # Joined so to_dict() doesn't issue two extra SELECTs per business
     instagram = relationship(
-        "InstagramData", back_populates="business", uselist=False, cascade="all, delete-orphan"
+        "InstagramData", back_populates="business", uselist=False, cascade="all, delete-orphan",
+        lazy="joined",
     )
     analysis = relationship(
-        "Analysis", back_populates="business", uselist=False, cascade="all, delete-orphan"
+        "Analysis", back_populates="business", uselist=False, cascade="all, delete-orphan",
+        lazy="joined",
     )
 
     def to_dict(self):
         website_grade = None
         if self.website_grade:
             try:
-                website_grade = json.loads(self.website_grade)
-            except (json.JSONDecodeError, TypeError):
+                website_grade = orjson.loads(self.website_grade)
+            except (orjson.JSONDecodeError, TypeError):
                 website_grade = None
         return {
             "id": self.id,
@@ -64,7 +70,7 @@ class InstagramData(Base):
     __tablename__ = "instagram_data"
 
     id = Column(Integer, primary_key=True)
-    business_id = Column(Integer, ForeignKey("businesses.id"), nullable=False)
+    business_id = Column(Integer, ForeignKey("businesses.id"), nullable=False, index=True)
     username = Column(String(100))
     followers = Column(Integer)
     following = Column(Integer)
@@ -93,8 +99,8 @@ class Analysis(Base):
     __tablename__ = "analyses"
 
     id = Column(Integer, primary_key=True)
-    business_id = Column(Integer, ForeignKey("businesses.id"), nullable=False)
-    revenue_streams = Column(Text)  # JSON string
+    business_id = Column(Integer, ForeignKey("businesses.id"), nullable=False, index=True)
+    revenue_streams = Column(JSON)
     estimated_revenue_tier = Column(String(50))
     pricing_strategy = Column(String(50))
     service_quality_score = Column(Float)
@@ -106,14 +112,8 @@ class Analysis(Base):
     business = relationship("Business", back_populates="analysis")
 
     def to_dict(self):
-        revenue_streams = None
-        if self.revenue_streams:
-            try:
-                revenue_streams = json.loads(self.revenue_streams)
-            except (json.JSONDecodeError, TypeError):
-                revenue_streams = self.revenue_streams
         return {
-            "revenue_streams": revenue_streams,
+            "revenue_streams": self.revenue_streams or [],
             "estimated_revenue_tier": self.estimated_revenue_tier,
             "pricing_strategy": self.pricing_strategy,
             "service_quality_score": self.service_quality_score,
@@ -122,3 +122,11 @@ class Analysis(Base):
             "niche_specific_insights": self.niche_specific_insights,
             "opportunity_score": self.opportunity_score,
         }
+
+
+class LLMCacheEntry(Base):
+    __tablename__ = "cached_llm_responses"
+
+    key = Column(String(64), primary_key=True)  # sha256 of the Groq request payload
+    value = Column(Text, nullable=False)        # raw message content returned by the model
+    created_at = Column(DateTime, default=datetime.utcnow)
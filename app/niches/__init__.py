@@ -1 +1,19 @@
 """Niches package."""
+import os
+from functools import lru_cache
+
+import orjson
+
+_NICHES_CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config.json")
+
+
+@lru_cache(maxsize=1)
+def load_niches():
+    """
+    Load niche configurations from config.json.
+
+    The file does not change at runtime, so it is read and parsed once per
+    process. Callers must treat the returned dict as read-only.
+    """
+    with open(_NICHES_CONFIG_PATH, "rb") as fh:
+        return orjson.loads(fh.read())
@@ -2,20 +2,26 @@
 Business analysis routes with pagination support.
 """
 import time
-import json
+import orjson
 import logging
 import uuid
-from threading import Thread
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from threading import Lock, Thread
 from datetime import datetime
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from sqlalchemy.orm import Session
 
+from app.config import Config
 from app.database import get_session
 from app.models import Business, InstagramData, Analysis
+from app.niches import load_niches
 from app.scrapers.google_maps import scrape_google_maps
 from app.scrapers.website import scrape_website
 from app.scrapers.instagram import scrape_instagram
-from app.analyzers.ai_analyzer import analyze_business
+from app.analyzers.ai_analyzer import (
+    analyze_businesses_batch, _calculate_opportunity_score, ANALYSIS_BATCH_SIZE,
+)
+from app.analyzers.website_grader import grade_websites_batch, GRADE_BATCH_SIZE
 from app.analyzers.lead_ranker import rank_leads, compute_lead_score
 
 logger = logging.getLogger(__name__)
@@ -24,12 +30,31 @@ analyze_bp = Blueprint("analyze", __name__)
 # In-memory storage for active jobs (use Redis in production)
 active_jobs = {}
 
+# Shared pool for the per-business scraping. The work is almost entirely
+# network I/O (website, Instagram), so businesses run concurrently and only
+# the DB writes stay on the calling thread.
+MAX_WORKERS = Config.ANALYZE_MAX_WORKERS
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="analyze")
+
+# Guards the per-request website caches shared by the scraping threads
+_website_cache_lock = Lock()
+
+# Pool for the batched Groq calls (website grades and analyses)
+_llm_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="analyze-llm")
+
+# Businesses the background job scrapes and analyses per round
+BACKGROUND_SLICE_SIZE = 10
+
 
 @analyze_bp.route("/analyze", methods=["POST"])
 def analyze():
     """
     Analyze businesses with pagination support.
     Returns first 10 results immediately + job_id for more.
+
+    With ``"async": true`` in the body the whole analysis runs in the
+    background and this returns 202 with a job_id straight away; poll
+    ``GET /analyze/<job_id>`` for progress and results.
     """
     body = request.get_json(silent=True) or {}
     
@@ -48,6 +73,31 @@ def analyze():
     
     logger.info(f"Starting analysis job {job_id}: {niche} in {location} (max: {max_results})")
     
+    app = current_app._get_current_object()
+
+    if body.get("async"):
+        active_jobs[job_id] = {
+            "status": "processing",
+            "total": 0,
+            "processed": 0,
+            "niche": niche,
+            "location": location
+        }
+
+        thread = Thread(
+            target=_run_analysis,
+            args=(app, job_id, niche, location, max_results)
+        )
+        thread.daemon = True
+        thread.start()
+
+        return jsonify({
+            "job_id": job_id,
+            "niche": niche,
+            "location": location,
+            "status": "processing"
+        }), 202
+
     # Get initial batch of raw businesses from Google Maps
     raw_businesses = scrape_google_maps(niche, location, max_results)
     
@@ -63,17 +113,14 @@ def analyze():
     # Process first 10 immediately for fast response
     quick_batch = raw_businesses[:10]
     businesses_output = []
-    
+
+    processed = _process_businesses(app, quick_batch, niche, location)
+
     session = get_session()
     
     try:
-        for idx, raw in enumerate(quick_batch):
-            try:
-                business_result = _analyze_single_business(raw, niche, location, job_id, idx, session)
-                businesses_output.append(business_result)
-            except Exception as exc:
-                logger.error(f"Failed to process business {idx}: {exc}")
-                session.rollback()
+        _save_results(session, processed, job_id)
+        businesses_output = [business_result for _, business_result in processed]
         
         # ── Lead-mode: rank first page by opportunity score ────────────────
         businesses_output = rank_leads(businesses_output)
@@ -98,7 +145,7 @@ def analyze():
         
         thread = Thread(
             target=_background_analyze,
-            args=(job_id, niche, location, raw_businesses[10:])
+            args=(app, job_id, niche, location, raw_businesses[10:])
         )
         thread.daemon = True
         thread.start()
@@ -117,6 +164,20 @@ def analyze():
     })
 
 
+@analyze_bp.route("/niches", methods=["GET"])
+def niches():
+    """
+    Return all supported niche configurations.
+    """
+    return jsonify({
+        key: {
+            "label": config.get("label"),
+            "common_services": config.get("common_services", []),
+        }
+        for key, config in load_niches().items()
+    })
+
+
 @analyze_bp.route('/migrate-db-columns', methods=['GET'])
 def migrate_db_columns():
     """Temporary migration endpoint - delete after use"""
@@ -172,6 +233,33 @@ def migrate_db_columns():
         else:
             results.append("analyses.opportunity_score already exists")
 
+        # revenue_streams used to be TEXT holding a JSON string; the model now
+        # maps it as JSON, which psycopg2 only decodes from a json column.
+        # SQLite stores JSON as text either way.
+        revenue_type = next(
+            (str(col['type']) for col in inspector.get_columns('analyses') if col['name'] == 'revenue_streams'),
+            None,
+        )
+        if engine.dialect.name == 'postgresql' and revenue_type and revenue_type.upper() != 'JSON':
+            session.execute(text(
+                'ALTER TABLE analyses ALTER COLUMN revenue_streams TYPE JSON '
+                "USING NULLIF(revenue_streams::text, '')::json"
+            ))
+            session.commit()
+            results.append("analyses.revenue_streams converted to JSON")
+        else:
+            results.append("analyses.revenue_streams needs no conversion")
+
+        # Indexes for the business_id joins and niche/location lookups
+        for index_sql in (
+            'CREATE INDEX IF NOT EXISTS ix_businesses_niche_location ON businesses(niche, location)',
+            'CREATE INDEX IF NOT EXISTS ix_instagram_data_business_id ON instagram_data(business_id)',
+            'CREATE INDEX IF NOT EXISTS ix_analyses_business_id ON analyses(business_id)',
+        ):
+            session.execute(text(index_sql))
+        session.commit()
+        results.append("indexes ensured")
+
         session.close()
         return {"status": "success", "message": ", ".join(results), "columns": columns}
     except Exception as e:
@@ -189,6 +277,40 @@ def job_status(job_id):
     return jsonify(active_jobs[job_id])
 
 
+@analyze_bp.route("/analyze/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """
+    Get status, progress and all results saved so far for a job.
+    """
+    job = active_jobs.get(job_id)
+    session = get_session()
+
+    try:
+        businesses = session.query(Business).filter(
+            Business.job_id == job_id
+        ).order_by(Business.position).all()
+
+        # Jobs that finished without a background phase are only in the DB
+        if job is None and not businesses:
+            return jsonify({"error": "Job not found"}), 404
+
+        job = job or {"status": "complete", "total": len(businesses), "processed": len(businesses)}
+        response = {
+            "job_id": job_id,
+            "status": job["status"],
+            "progress": {"processed": job["processed"], "total": job["total"]},
+            "results_count": len(businesses),
+            "businesses": [business.to_dict() for business in businesses]
+        }
+        if "error" in job:
+            response["error"] = job["error"]
+
+        return jsonify(response)
+
+    finally:
+        session.close()
+
+
 @analyze_bp.route("/analyze/<job_id>/more", methods=["GET"])
 def get_more_results(job_id):
     """
@@ -231,9 +353,16 @@ def get_more_results(job_id):
         session.close()
 
 
-def _analyze_single_business(raw, niche, location, job_id, position, session):
+def _scrape_business(raw, niche, location, website_cache):
     """
-    Analyze a single business with all enrichment steps.
+    Scrape the website and Instagram profile for a single business.
+
+    *website_cache* is shared by every business in the same request so that
+    a site used by several listings (chains, franchises) is only scraped
+    once; see ``_scrape_website_once``.
+
+    Returns ``(business_result, website_data)``. Does not touch the database
+    or Groq, so it is safe to run on a worker thread.
     """
     business_result = dict(raw)
     business_result["niche"] = niche
@@ -242,27 +371,13 @@ def _analyze_single_business(raw, niche, location, job_id, position, session):
     # 1. Scrape website
     website_data = {}
     if raw.get("website"):
-        try:
-            website_data = scrape_website(raw["website"]) or {}
-        except Exception as exc:
-            logger.error(f"Website scraper failed for {raw.get('website')}: {exc}")
+        website_data = _scrape_website_once(raw["website"], website_cache)
     
     business_result["services"] = website_data.get("services", [])
     business_result["prices"] = website_data.get("prices", [])
     business_result["team_members"] = website_data.get("team_members", [])
     
-    # 2. Grade website
-    website_grade = {}
-    if website_data:
-        try:
-            from app.analyzers.website_grader import grade_website
-            website_grade = grade_website(website_data)
-        except Exception as exc:
-            logger.error(f"Website grading failed for {raw.get('website')}: {exc}")
-    
-    business_result["website_grade"] = website_grade
-    
-    # 3. Scrape Instagram
+    # 2. Scrape Instagram
     ig_data = None
     try:
         ig_data = scrape_instagram(
@@ -274,28 +389,211 @@ def _analyze_single_business(raw, niche, location, job_id, position, session):
     
     business_result["instagram"] = ig_data
     
-    # 4. AI analysis
-    analysis_result = {}
+    return business_result, website_data
+
+
+def _normalize_url(url):
+    """Key used to spot the same website listed under several businesses."""
+    return url.lower().rstrip("/")
+
+
+def _scrape_website_once(url, website_cache):
+    """
+    Scrape *url* unless another business in the request already has.
+
+    *website_cache* maps normalized URLs to Futures, so a thread asking for a
+    site that is still being scraped waits for that result instead of
+    starting a second browser. The cache lock is only held to claim the key.
+    Failed scrapes resolve to an empty dict, like before.
+    """
+    key = _normalize_url(url)
+    with _website_cache_lock:
+        future = website_cache.get(key)
+        owner = future is None
+        if owner:
+            future = website_cache[key] = Future()
+
+    if not owner:
+        return future.result()
+
+    website_data = {}
     try:
-        analysis_result = analyze_business(business_result, niche)
+        website_data = scrape_website(url) or {}
     except Exception as exc:
-        logger.error(f"AI analysis failed for {raw.get('name')}: {exc}")
-    
-    business_result["analysis"] = analysis_result
-    
-    # 5. Save to database
+        logger.error(f"Website scraper failed for {url}: {exc}")
+    future.set_result(website_data)
+    return website_data
+
+
+def _enrich_businesses(app, scraped, niche):
+    """
+    Grade websites and run the AI analysis for every scraped business.
+
+    *scraped* is a list of ``(business_result, website_data)`` pairs; each
+    business_result is updated in place with ``website_grade`` and
+    ``analysis``. Businesses are sent to Groq in batches, and the grade and
+    analysis batches run concurrently since neither needs the other. A grade
+    depends only on the website, so each distinct site is graded once and
+    the grade is shared by every business that lists it.
+    """
+    sites = {}
+    for result, data in scraped:
+        if data:
+            sites.setdefault(_normalize_url(result["website"]), data)
+    grade_jobs = [
+        (chunk, _llm_executor.submit(
+            _run_in_app_context, app, grade_websites_batch, [data for _, data in chunk],
+        ))
+        for chunk in _chunked(list(sites.items()), GRADE_BATCH_SIZE)
+    ]
+    analysis_jobs = [
+        (chunk, _llm_executor.submit(
+            _run_in_app_context, app, analyze_businesses_batch, [result for result, _ in chunk], niche,
+        ))
+        for chunk in _chunked(scraped, ANALYSIS_BATCH_SIZE)
+    ]
+
+    for result, _ in scraped:
+        result["website_grade"] = {}
+        result["analysis"] = {}
+
+    grades = {}
+    for chunk, future in grade_jobs:
+        try:
+            for (key, _), grade in zip(chunk, future.result()):
+                grades[key] = grade
+        except Exception as exc:
+            logger.error(f"Website grading failed for {len(chunk)} websites: {exc}")
+
+    for result, data in scraped:
+        if data:
+            result["website_grade"] = grades.get(_normalize_url(result["website"]), {})
+
+    for chunk, future in analysis_jobs:
+        try:
+            for (result, _), analysis in zip(chunk, future.result()):
+                result["analysis"] = analysis
+        except Exception as exc:
+            logger.error(f"AI analysis failed for {len(chunk)} businesses: {exc}")
+
+    # The analyses ran before the grades were known, so redo the opportunity
+    # scores now that they are
+    for result, _ in scraped:
+        analysis = result["analysis"]
+        if analysis.get("opportunity_score"):
+            analysis["opportunity_score"] = _calculate_opportunity_score(result, result["website_grade"])
+
+
+def _process_businesses(app, raw_businesses, niche, location, start=0):
+    """
+    Scrape every raw business on the shared thread pool, then grade and
+    analyse them with batched Groq calls.
+
+    Returns ``(position, business_result)`` tuples in input order, where
+    position is *start* plus the index in *raw_businesses*. Businesses whose
+    scrape raised are logged and skipped.
+    """
+    website_cache = {}
+    futures = {
+        _executor.submit(_scrape_business, raw, niche, location, website_cache): start + idx
+        for idx, raw in enumerate(raw_businesses)
+    }
+    scraped = []
+    for future in as_completed(futures):
+        position = futures[future]
+        try:
+            scraped.append((position, future.result()))
+        except Exception as exc:
+            logger.error(f"Failed to process business {position}: {exc}")
+
+    scraped.sort(key=lambda item: item[0])
+    _enrich_businesses(app, [pair for _, pair in scraped], niche)
+    return [(position, result) for position, (result, _) in scraped]
+
+
+def _chunked(items, size):
+    """Split *items* into consecutive lists of at most *size* elements."""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _run_in_app_context(app, func, *args):
+    """Call *func* inside *app*'s context (the analyzers read ``current_app.config``)."""
+    with app.app_context():
+        return func(*args)
+
+
+def _save_results(session, processed, job_id):
+    """
+    Persist processed businesses with a single bulk insert.
+
+    *processed* is a list of ``(position, business_result)`` tuples. Once
+    flushed, each business_result gets its DB ``id`` so later position
+    updates can find the row directly. If the bulk insert fails, the
+    businesses are saved one at a time, each in its own savepoint, so a bad
+    row only loses that business.
+    """
+    rows = [
+        (business_result, _build_orm_objects(business_result, job_id, position))
+        for position, business_result in processed
+    ]
     try:
-        _save_to_db(session, business_result, ig_data, analysis_result, website_grade, job_id, position)
+        session.add_all([business for _, business in rows])
+        session.flush()
     except Exception as exc:
-        logger.error(f"DB save failed for {raw.get('name')}: {exc}")
+        logger.warning(f"Bulk save failed for {len(rows)} businesses in job {job_id}; saving one by one: {exc}")
         session.rollback()
-    
-    return business_result
+        rows = _save_results_one_by_one(session, processed, job_id)
+
+    for business_result, business in rows:
+        business_result["id"] = business.id
+
+
+def _save_results_one_by_one(session, processed, job_id):
+    """
+    Insert each business in its own savepoint, skipping the ones that fail.
+    Returns the ``(business_result, business)`` pairs that were saved.
+    """
+    saved = []
+    for position, business_result in processed:
+        # Fresh objects: the ones from the failed bulk insert may still
+        # carry ids from the rolled-back flush
+        business = _build_orm_objects(business_result, job_id, position)
+        try:
+            with session.begin_nested():
+                session.add(business)
+        except Exception as exc:
+            logger.error(f"DB save failed for business {business_result.get('name')} in job {job_id}: {exc}")
+            continue
+        saved.append((business_result, business))
+    return saved
+
+
+def _run_analysis(app, job_id, niche, location, max_results):
+    """
+    Background job for an async /analyze request: find the businesses, then
+    process all of them like the remainder of a synchronous request.
+    """
+    try:
+        raw_businesses = scrape_google_maps(niche, location, max_results)
+    except Exception as exc:
+        logger.error(f"Google Maps scrape failed for job {job_id}: {exc}")
+        raw_businesses = []
+
+    if not raw_businesses:
+        active_jobs[job_id]["status"] = "failed"
+        active_jobs[job_id]["error"] = "No businesses found"
+        return
 
+    active_jobs[job_id]["total"] = len(raw_businesses)
+    _background_analyze(app, job_id, niche, location, raw_businesses, start=0)
 
-def _background_analyze(job_id, niche, location, raw_businesses):
+
+def _background_analyze(app, job_id, niche, location, raw_businesses, start=10):
     """
     Background job to process remaining businesses.
+
+    *start* is the position of the first business in *raw_businesses*
+    within the job.
     """
     logger.info(f"Background job {job_id} processing {len(raw_businesses)} businesses")
     
@@ -303,26 +601,31 @@ def _background_analyze(job_id, niche, location, raw_businesses):
     
     try:
         background_results = []
-        for idx, raw in enumerate(raw_businesses, start=10):
+        # Work in slices so results become visible via /more as each lands
+        for offset in range(0, len(raw_businesses), BACKGROUND_SLICE_SIZE):
+            raw_slice = raw_businesses[offset:offset + BACKGROUND_SLICE_SIZE]
             try:
-                business_result = _analyze_single_business(raw, niche, location, job_id, idx, session)
+                processed = _process_businesses(app, raw_slice, niche, location, start=start + offset)
+                _save_results(session, processed, job_id)
                 session.commit()
-                background_results.append(business_result)
+                background_results.extend(business_result for _, business_result in processed)
                 
                 # Update job status
                 if job_id in active_jobs:
-                    active_jobs[job_id]["processed"] = idx + 1
-                
-                logger.info(f"Job {job_id}: Processed {idx + 1}/{active_jobs[job_id]['total']}")
+                    active_jobs[job_id]["processed"] += len(processed)
+                    logger.info(
+                        f"Job {job_id}: Processed "
+                        f"{active_jobs[job_id]['processed']}/{active_jobs[job_id]['total']}"
+                    )
                 
             except Exception as exc:
-                logger.error(f"Error processing business {idx} in job {job_id}: {exc}")
+                logger.error(f"Error processing businesses {start + offset}+ in job {job_id}: {exc}")
                 session.rollback()
 
         # ── Lead-mode: rank background batch, then do a full job re-rank ──
         if background_results:
             ranked_background = rank_leads(background_results)
-            _update_positions_in_db(session, ranked_background, job_id, start=10)
+            _update_positions_in_db(session, ranked_background, job_id, start=start)
             session.commit()
 
         # Full re-rank: pull ALL businesses for the job from DB, reorder, and
@@ -345,10 +648,15 @@ def _background_analyze(job_id, niche, location, raw_businesses):
         session.close()
 
 
-def _save_to_db(session, business_data, ig_data, analysis_data, website_grade, job_id, position):
+def _build_orm_objects(business_data, job_id, position):
     """
-    Save business and related data to database.
+    Build the Business row for a processed business, with its InstagramData
+    and Analysis children attached, without adding anything to a session.
     """
+    website_grade = business_data.get("website_grade")
+    ig_data = business_data.get("instagram")
+    analysis_data = business_data.get("analysis")
+
     wg_score = website_grade.get("total_score") if website_grade else None
     business = Business(
         job_id=job_id,
@@ -364,14 +672,11 @@ def _save_to_db(session, business_data, ig_data, analysis_data, website_grade, j
         hours=business_data.get("hours"),
         scraped_at=datetime.utcnow(),
         website_grade_score=wg_score,
-        website_grade=json.dumps(website_grade) if website_grade else None,
+        website_grade=orjson.dumps(website_grade).decode() if website_grade else None,
     )
-    session.add(business)
-    session.flush()
     
     if ig_data:
-        ig = InstagramData(
-            business_id=business.id,
+        business.instagram = InstagramData(
             username=ig_data.get("username"),
             followers=ig_data.get("followers"),
             following=ig_data.get("following"),
@@ -381,16 +686,14 @@ def _save_to_db(session, business_data, ig_data, analysis_data, website_grade, j
             is_verified=ig_data.get("is_verified", False),
             is_business=ig_data.get("is_business", False),
         )
-        session.add(ig)
     
     if analysis_data:
         opportunity_score = analysis_data.get("opportunity_score")
         # Fall back to server-side score if AI didn't produce one
         if opportunity_score is None:
             opportunity_score = compute_lead_score(business_data)
-        analysis = Analysis(
-            business_id=business.id,
-            revenue_streams=json.dumps(analysis_data.get("revenue_streams", [])),
+        business.analysis = Analysis(
+            revenue_streams=analysis_data.get("revenue_streams", []),
             estimated_revenue_tier=analysis_data.get("estimated_revenue_tier"),
             pricing_strategy=analysis_data.get("pricing_strategy"),
             service_quality_score=analysis_data.get("service_quality_score"),
@@ -399,7 +702,9 @@ def _save_to_db(session, business_data, ig_data, analysis_data, website_grade, j
             niche_specific_insights=analysis_data.get("niche_specific_insights"),
             opportunity_score=opportunity_score,
         )
-        session.add(analysis)
+
+    return business
+
 
 def _update_positions_in_db(session, ranked_businesses: list, job_id: str, start: int = 0):
     """
@@ -445,8 +750,8 @@ def _rerank_job(session, job_id: str):
         wg = None
         if b.website_grade:
             try:
-                wg = json.loads(b.website_grade)
-            except (json.JSONDecodeError, TypeError):
+                wg = orjson.loads(b.website_grade)
+            except (orjson.JSONDecodeError, TypeError):
                 wg = None
         analysis_score = None
         if b.analysis:
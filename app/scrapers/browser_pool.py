@@ -0,0 +1,125 @@
+"""
+Pool of long-lived headless Chromium browsers shared by the scrapers.
+
+Launching Chromium costs 1–3 s, so instead of starting one per URL the
+scrapers borrow an already running browser and open a fresh context on it.
+
+Playwright's sync API is bound to the thread that started it: a browser
+created on one thread can't be driven from another. Each pool worker
+therefore owns its browser and runs the jobs handed to it, while callers
+block on the result.
+"""
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = Config.BROWSER_POOL_SIZE
+
+# Relaunch a browser after this many jobs to cap memory growth
+MAX_USES_PER_BROWSER = 50
+
+# Third-party trackers that never contribute scraped content
+ANALYTICS_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "connect.facebook.net",
+    "hotjar.com",
+)
+
+_jobs = queue.Queue()
+_workers = []
+_start_lock = threading.Lock()
+
+
+def run_in_browser(func, *args, **kwargs):
+    """
+    Call ``func(browser, *args, **kwargs)`` on a pooled browser and return
+    its result. Exceptions raised by *func* propagate to the caller.
+
+    *func* must not keep references to Playwright objects after it returns;
+    they are only valid on the pool thread.
+    """
+    _ensure_started()
+    future = Future()
+    _jobs.put((future, func, args, kwargs))
+    return future.result()
+
+
+def block_resources(context, resource_types):
+    """
+    Abort requests in *context* for the given Playwright resource types
+    (e.g. ``"image"``, ``"font"``) and for known analytics hosts. The
+    scrapers only read the HTML, so these are wasted bytes and JS time.
+    """
+    resource_types = frozenset(resource_types)
+
+    def _handle(route):
+        request = route.request
+        if request.resource_type in resource_types or any(host in request.url for host in ANALYTICS_HOSTS):
+            route.abort()
+        else:
+            route.continue_()
+
+    context.route("**/*", _handle)
+
+
+def _ensure_started():
+    """Start the worker threads on first use."""
+    if _workers:
+        return
+    with _start_lock:
+        if _workers:
+            return
+        for number in range(POOL_SIZE):
+            worker = threading.Thread(target=_worker, name=f"browser-{number}", daemon=True)
+            worker.start()
+            _workers.append(worker)
+        logger.info("Started browser pool with %d workers", POOL_SIZE)
+
+
+def _worker():
+    """Serve jobs from the queue with this thread's own browser."""
+    from playwright.sync_api import sync_playwright
+
+    playwright = None
+    browser = None
+    uses = 0
+
+    while True:
+        future, func, args, kwargs = _jobs.get()
+        if not future.set_running_or_notify_cancel():
+            continue
+
+        try:
+            if playwright is None:
+                playwright = sync_playwright().start()
+            if browser is None or not browser.is_connected() or uses >= MAX_USES_PER_BROWSER:
+                _close_browser(browser)
+                browser = playwright.chromium.launch(headless=True)
+                uses = 0
+            uses += 1
+            result = func(browser, *args, **kwargs)
+        except Exception as exc:
+            future.set_exception(exc)
+            # The failure may have left the browser in a bad state; start a
+            # clean one for the next job
+            _close_browser(browser)
+            browser = None
+        else:
+            future.set_result(result)
+
+
+def _close_browser(browser):
+    """Close *browser*, ignoring errors from one that already died."""
+    if browser is None:
+        return
+    try:
+        browser.close()
+    except Exception as exc:
+        logger.debug("Error closing pooled browser: %s", exc)
@@ -3,106 +3,234 @@ Google Maps scraper using Playwright.
 """
 import re
 import logging
+from app.scrapers.browser_pool import block_resources, run_in_browser
 from app.scrapers.utils import random_delay, clean_text
 
+try:
+    from playwright.sync_api import TimeoutError as PWTimeout
+    _HAS_PLAYWRIGHT = True
+except ImportError:
+    _HAS_PLAYWRIGHT = False
+
 logger = logging.getLogger(__name__)
 
 # Maximum time (ms) to wait for page elements
 DEFAULT_TIMEOUT = 15000
 
+_RATING_RE = re.compile(r"([\d.]+)")
+_REVIEWS_RE = re.compile(r"([\d,]+)")
+_CARD_REVIEWS_RE = re.compile(r"([\d,]+)\s+review", re.IGNORECASE)
+_CARD_PHONE_RE = re.compile(r"(?:\+\d{1,3}[\s.-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}")
+# Street addresses start with a house number followed by a word
+_CARD_ADDRESS_RE = re.compile(r"^\d+[A-Za-z]?\s+[A-Za-z]")
+# Opening-status rows such as "Open 24 hours" or "Closed · Opens 9 AM Mon"
+_CARD_HOURS_RE = re.compile(r"^(?:Open|Opens|Closed|Closes|Temporarily closed|Permanently closed)\b")
+
+# Business fields for the data-item-id prefixes on the info buttons
+_ITEM_FIELDS = {
+    "address": "address",
+    "phone": "phone",
+    "authority": "website",
+}
+
+# Fields worth opening a listing's page for when its feed card lacks them.
+# Hours aren't among them: cards only show today's opening status, which is
+# kept as the hours for listings that aren't opened. Pass a detail_fields
+# that includes "hours" to always get the full weekly hours.
+DETAIL_FIELDS = ("address", "phone", "website")
+
+# Returns one entry per distinct listing in the results feed (up to the
+# limit), with the raw text the card shows
+_FEED_JS = """
+(limit) => {
+    const feed = document.querySelector('[role="feed"]');
+    const cards = [];
+    const seen = new Set();
+    if (!feed) return cards;
+    for (const link of feed.querySelectorAll('a[href*="/maps/place/"]')) {
+        if (cards.length >= limit) break;
+        const href = link.getAttribute('href');
+        if (!href || seen.has(href)) continue;
+        seen.add(href);
+        const card = link.closest('[role="article"]') || link.parentElement;
+        const stars = card.querySelector('span[role="img"][aria-label]');
+        const site = card.querySelector('a[data-value="Website"], a[aria-label*="website" i]');
+        cards.push({
+            href,
+            name: link.getAttribute('aria-label') || card.getAttribute('aria-label'),
+            rating: stars ? stars.getAttribute('aria-label') : null,
+            website: site ? site.getAttribute('href') : null,
+            lines: card.innerText.split('\\n'),
+        });
+    }
+    return cards;
+}
+"""
+
+# Collects the raw business panel fields in a single DOM pass; parsing them
+# happens in Python. Selectors are tried in order.
+_DETAILS_JS = """
+() => {
+    const first = (...selectors) => {
+        for (const selector of selectors) {
+            const el = document.querySelector(selector);
+            if (el) return el;
+        }
+        return null;
+    };
+    const nameEl = first('h1.fontHeadlineLarge', 'h1[class*="DUwDvf"]', 'div[role="main"] h1', 'h1');
+    const ratingEl = first('[jsaction*="pane.rating"]', 'span[aria-label*="stars"]');
+    const reviewsEl = first('button[jsaction*="reviewChart"]', 'span[aria-label*="review"]');
+    const hoursEl = document.querySelector('button[data-item-id*="oh"]');
+    const items = [...document.querySelectorAll('button[data-item-id], a[data-item-id]')].map(el => ({
+        id: el.getAttribute('data-item-id'),
+        text: el.innerText,
+        href: el.getAttribute('href'),
+    }));
+    return {
+        name: nameEl ? nameEl.innerText : null,
+        rating: ratingEl ? (ratingEl.getAttribute('aria-label') || ratingEl.innerText) : null,
+        reviews: reviewsEl ? reviewsEl.innerText : null,
+        hours: hoursEl ? (hoursEl.getAttribute('aria-label') || hoursEl.innerText) : null,
+        items,
+    };
+}
+"""
+
 
-def scrape_google_maps(niche, location, max_results=10):
+def scrape_google_maps(niche, location, max_results=10, detail_fields=DETAIL_FIELDS):
     """
     Scrape businesses from Google Maps for a given niche and location.
 
+    Listings are read from the result cards; a listing's own page is only
+    opened when one of *detail_fields* is missing from its card, and its
+    values then replace the card's.
+
     Returns a list of business dictionaries containing:
       name, rating, reviews_count, address, phone, website, hours
     """
-    try:
-        from playwright.sync_api import sync_playwright, TimeoutError as PWTimeout
-    except ImportError:
+    if not _HAS_PLAYWRIGHT:
         logger.error("Playwright is not installed. Run: pip install playwright && playwright install chromium")
         return []
 
-    results = []
     query = f"{niche} in {location}"
 
     try:
-        with sync_playwright() as pw:
-            browser = pw.chromium.launch(headless=True)
-            context = browser.new_context(
-                user_agent=(
-                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) "
-                    "Chrome/120.0.0.0 Safari/537.36"
-                )
-            )
-            page = context.new_page()
-            page.set_default_timeout(DEFAULT_TIMEOUT)
-
-            url = f"https://www.google.com/maps/search/{query.replace(' ', '+')}"
-            logger.info("Navigating to: %s", url)
-            page.goto(url, wait_until="domcontentloaded")
-
-            # Wait for the results panel
-            try:
-                page.wait_for_selector('[role="feed"]', timeout=DEFAULT_TIMEOUT)
-            except PWTimeout:
-                logger.warning("Results feed not found for query: %s", query)
-                browser.close()
-                return []
-
-            # Scroll to load more results
-            feed = page.query_selector('[role="feed"]')
-            if feed:
-                for _ in range(max(1, max_results // 5)):
-                    page.evaluate("(el) => el.scrollBy(0, 1000)", feed)
-                    random_delay(1.0, 1.5)
-
-            # Collect listing HREFs instead of elements (to avoid stale references)
-            listings = page.query_selector_all('a[href*="/maps/place/"]')
-            logger.info("Found %d listing links", len(listings))
-
-            # Extract hrefs first before clicking
-            hrefs_to_visit = []
-            seen_hrefs = set()
-            
-            for listing in listings:
-                if len(hrefs_to_visit) >= max_results:
-                    break
-                    
-                href = listing.get_attribute("href") or ""
-                if href and href not in seen_hrefs:
-                    hrefs_to_visit.append(href)
-                    seen_hrefs.add(href)
-
-            # Now visit each URL directly instead of clicking
-            for href in hrefs_to_visit:
+        return run_in_browser(_search_maps, query, max_results, tuple(detail_fields))
+    except Exception as exc:
+        logger.error("Google Maps scraper error: %s", exc)
+        return []
+
+
+def _search_maps(browser, query, max_results, detail_fields):
+    """Run the Maps search for *query* on a pooled browser and scrape each listing."""
+    results = []
+    context = browser.new_context(
+        user_agent=(
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/120.0.0.0 Safari/537.36"
+        )
+    )
+    # Stylesheets stay: layout decides which listing cards render in the feed
+    block_resources(context, ("image", "media", "font"))
+    try:
+        page = context.new_page()
+        page.set_default_timeout(DEFAULT_TIMEOUT)
+
+        url = f"https://www.google.com/maps/search/{query.replace(' ', '+')}"
+        logger.info("Navigating to: %s", url)
+        page.goto(url, wait_until="domcontentloaded")
+
+        # Wait for the results panel
+        try:
+            page.wait_for_selector('[role="feed"]', timeout=DEFAULT_TIMEOUT)
+        except PWTimeout:
+            logger.warning("Results feed not found for query: %s", query)
+            return []
+
+        # Scroll to load more results
+        feed = page.query_selector('[role="feed"]')
+        if feed:
+            for _ in range(max(1, max_results // 5)):
+                page.evaluate("(el) => el.scrollBy(0, 1000)", feed)
+                random_delay(1.0, 1.5)
+
+        # Harvest what the feed cards already show, then open only the
+        # listings still missing a field the caller needs
+        cards = page.evaluate(_FEED_JS, max_results) if feed else []
+        logger.info("Found %d listing cards", len(cards))
+
+        for card in cards:
+            business = _parse_card(card)
+            if not business["name"] or any(not business.get(field) for field in detail_fields):
                 try:
-                    page.goto(href, wait_until="domcontentloaded", timeout=10000)
+                    page.goto(card["href"], wait_until="domcontentloaded", timeout=10000)
                     random_delay(0.5, 1.0)
-
-                    business = _extract_business_details(page)
-                    if business.get("name"):
-                        results.append(business)
-                        logger.info("Scraped: %s", business.get("name"))
+                    # The panel is authoritative; the card values are
+                    # pattern-matched guesses
+                    for key, value in _extract_business_details(page).items():
+                        if value:
+                            business[key] = value
                 except Exception as exc:
-                    logger.warning("Error navigating to %s: %s", href, exc)
+                    logger.warning("Error navigating to %s: %s", card["href"], exc)
 
-            browser.close()
-    except Exception as exc:
-        logger.error("Google Maps scraper error: %s", exc)
+            if business.get("name"):
+                results.append(business)
+                logger.info("Scraped: %s", business.get("name"))
+    finally:
+        context.close()
 
     return results
 
 
+def _parse_card(card):
+    """Build a business dict from the raw fields of one feed card."""
+    business = {
+        "name": clean_text(card.get("name") or ""),
+        "rating": None,
+        "reviews_count": None,
+        "address": None,
+        "phone": None,
+        "website": None,
+        "hours": None,
+    }
+
+    # e.g. "4.6 stars 212 Reviews"
+    stars = card.get("rating") or ""
+    m = _RATING_RE.search(stars)
+    business["rating"] = float(m.group(1)) if m else None
+    m = _CARD_REVIEWS_RE.search(stars)
+    business["reviews_count"] = int(m.group(1).replace(",", "")) if m else None
+
+    website = card.get("website") or ""
+    if website.startswith("http") and "google.com" not in website and "maps" not in website:
+        business["website"] = website
+
+    # Detail rows look like "Gym · 123 Main St" and
+    # "Open · Closes 10 PM · (555) 123-4567"
+    hours = []
+    for line in card.get("lines") or ():
+        for part in line.split("·"):
+            part = clean_text(part)
+            if not part or part == business["name"]:
+                continue
+            if not business["phone"]:
+                m = _CARD_PHONE_RE.search(part)
+                if m:
+                    business["phone"] = m.group(0)
+                    continue
+            if _CARD_HOURS_RE.match(part):
+                hours.append(part)
+            elif not business["address"] and _CARD_ADDRESS_RE.match(part):
+                business["address"] = part
+    business["hours"] = " · ".join(hours) or None
+
+    return business
+
+
 def _extract_business_details(page):
     """Extract details from an open Google Maps business panel."""
-    try:
-        from playwright.sync_api import TimeoutError as PWTimeout
-    except ImportError:
-        return {}
-
     business = {}
 
     # Wait for the business details panel to fully load
@@ -114,67 +242,43 @@ def _extract_business_details(page):
         except Exception:
             pass
 
-    # Name - try multiple selectors and filter out "Results"
-    name_el = page.query_selector('h1.fontHeadlineLarge') or \
-              page.query_selector('h1[class*="DUwDvf"]') or \
-              page.query_selector('div[role="main"] h1') or \
-              page.query_selector('h1')
-              
-    if name_el:
-        name_text = clean_text(name_el.inner_text())
-        # Filter out generic text like "Results"
-        if name_text and name_text.lower() not in ["results", "result", ""]:
-            business["name"] = name_text
-        else:
-            business["name"] = ""
-    else:
-        business["name"] = ""
+    # One round trip for every field instead of a query per element
+    try:
+        raw = page.evaluate(_DETAILS_JS)
+    except Exception as exc:
+        logger.warning("Could not read business panel: %s", exc)
+        raw = {}
+
+    # Name - filter out generic text like "Results"
+    name_text = clean_text(raw.get("name") or "")
+    business["name"] = name_text if name_text.lower() not in ("results", "result") else ""
 
     # Rating
-    try:
-        rating_el = page.query_selector('[jsaction*="pane.rating"]') or \
-                    page.query_selector('span[aria-label*="stars"]')
-        if rating_el:
-            text = rating_el.get_attribute("aria-label") or rating_el.inner_text()
-            m = re.search(r"([\d.]+)", text)
-            business["rating"] = float(m.group(1)) if m else None
-        else:
-            business["rating"] = None
-    except Exception:
-        business["rating"] = None
+    m = _RATING_RE.search(raw.get("rating") or "")
+    business["rating"] = float(m.group(1)) if m else None
 
     # Reviews count
-    try:
-        reviews_el = page.query_selector('button[jsaction*="reviewChart"]') or \
-                     page.query_selector('span[aria-label*="review"]')
-        if reviews_el:
-            text = reviews_el.inner_text()
-            m = re.search(r"([\d,]+)", text)
-            business["reviews_count"] = int(m.group(1).replace(",", "")) if m else None
-        else:
-            business["reviews_count"] = None
-    except Exception:
-        business["reviews_count"] = None
-
-    # Address, phone, website, hours — extracted from info buttons/links
-    info_buttons = page.query_selector_all('button[data-item-id], a[data-item-id]')
-    for btn in info_buttons:
-        item_id = btn.get_attribute("data-item-id") or ""
-        text = clean_text(btn.inner_text())
-        href = btn.get_attribute("href") or ""
-
-        if "address" in item_id:
-            business["address"] = text
-        elif "phone" in item_id:
-            business["phone"] = text
-        elif "authority" in item_id or href.startswith("http"):
+    m = _REVIEWS_RE.search(raw.get("reviews") or "")
+    business["reviews_count"] = int(m.group(1).replace(",", "")) if m else None
+
+    # Address, phone, website — extracted from info buttons/links, keyed by
+    # the data-item-id prefix (e.g. "phone:tel:+15125550100")
+    for item in raw.get("items") or ():
+        item_id = item.get("id") or ""
+        href = item.get("href") or ""
+        field = _ITEM_FIELDS.get(item_id.split(":", 1)[0])
+
+        if field is None and href.startswith("http"):
+            field = "website"
+        if field == "website":
             if href and "google.com" not in href and "maps" not in href:
                 business["website"] = href
+        elif field:
+            business[field] = clean_text(item.get("text") or "")
 
     # Hours (aria-label on hours button)
-    hours_btn = page.query_selector('button[data-item-id*="oh"]')
-    if hours_btn:
-        business["hours"] = clean_text(hours_btn.get_attribute("aria-label") or hours_btn.inner_text())
+    if raw.get("hours"):
+        business["hours"] = clean_text(raw["hours"])
 
     # Fill missing keys
     for key in ("address", "phone", "website", "hours"):
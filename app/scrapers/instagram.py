@@ -2,10 +2,27 @@
 Instagram scraper using the free instaloader library.
 """
 import logging
-from app.scrapers.utils import extract_instagram_username_from_url, generate_instagram_usernames
+import threading
+from itertools import islice
+
+from app.scrapers.utils import TTLCache, extract_instagram_username_from_url, generate_instagram_usernames
+
+try:
+    import instaloader
+except ImportError:
+    instaloader = None
 
 logger = logging.getLogger(__name__)
 
+# Profiles found recently, keyed by (business_name, website_instagram_url).
+# Only successful lookups are cached so rate-limited misses get retried.
+_profile_cache = TTLCache(ttl=3600, maxsize=10000)
+
+# One Instaloader for all lookups so its HTTP session and rate-limit state
+# carry over between businesses; created on first use
+_loader = None
+_loader_lock = threading.Lock()
+
 
 def scrape_instagram(business_name, website_instagram_url=None):
     """
@@ -17,18 +34,17 @@ def scrape_instagram(business_name, website_instagram_url=None):
 
     Returns a dict with profile data, or None if scraping fails/unavailable.
     """
-    try:
-        import instaloader
-    except ImportError:
+    cache_key = (business_name, website_instagram_url)
+    cached = _profile_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    if instaloader is None:
         logger.warning("instaloader is not installed. Skipping Instagram scraping.")
         return None
 
     try:
-        # Configure loader to be more gentle and avoid rate limits
-        loader = instaloader.Instaloader(
-            max_connection_attempts=1,  # Don't retry on failure
-            request_timeout=10.0,       # Fail fast
-        )
+        loader = _get_loader()
 
         # Build list of usernames to try
         usernames_to_try = []
@@ -48,7 +64,7 @@ def scrape_instagram(business_name, website_instagram_url=None):
             try:
                 profile = instaloader.Profile.from_username(loader.context, username)
                 # Don't calculate engagement to avoid extra requests
-                return {
+                profile_data = {
                     "username": profile.username,
                     "followers": profile.followers,
                     "following": profile.followees,
@@ -58,6 +74,8 @@ def scrape_instagram(business_name, website_instagram_url=None):
                     "is_verified": profile.is_verified,
                     "is_business": profile.is_business_account,
                 }
+                _profile_cache.set(cache_key, profile_data)
+                return profile_data
             except instaloader.exceptions.ProfileNotExistsException:
                 logger.debug("Instagram profile not found: %s", username)
             except (instaloader.exceptions.ConnectionException, 
@@ -77,6 +95,19 @@ def scrape_instagram(business_name, website_instagram_url=None):
         return None
 
 
+def _get_loader():
+    """Return the shared Instaloader, creating it on first use."""
+    global _loader
+    with _loader_lock:
+        if _loader is None:
+            # Configure loader to be more gentle and avoid rate limits
+            _loader = instaloader.Instaloader(
+                max_connection_attempts=1,  # Don't retry on failure
+                request_timeout=10.0,       # Fail fast
+            )
+    return _loader
+
+
 def _calculate_engagement(profile):
     """
     Calculate engagement rate from the last 12 posts.
@@ -87,21 +118,13 @@ def _calculate_engagement(profile):
         return 0.0
 
     try:
-        posts = profile.get_posts()
-        likes_list = []
-        comments_list = []
-        for i, post in enumerate(posts):
-            if i >= 12:
-                break
-            likes_list.append(post.likes)
-            comments_list.append(post.comments)
-
-        if not likes_list:
+        posts = list(islice(profile.get_posts(), 12))
+        if not posts:
             return 0.0
 
-        avg_likes = sum(likes_list) / len(likes_list)
-        avg_comments = sum(comments_list) / len(comments_list)
-        return round((avg_likes + avg_comments) / profile.followers * 100, 2)
+        total_likes = sum(post.likes for post in posts)
+        total_comments = sum(post.comments for post in posts)
+        return round((total_likes + total_comments) / len(posts) / profile.followers * 100, 2)
     except Exception as exc:
         logger.warning("Error calculating engagement rate: %s", exc)
         return 0.0
\ No newline at end of file
@@ -5,9 +5,49 @@ import re
 import logging
 import time
 import random
+import threading
+from collections import OrderedDict
 
 logger = logging.getLogger(__name__)
 
+_PRICE_RE = re.compile(r"\$\s*\d+(?:,\d{3})*(?:\.\d{2})?")
+_IG_URL_RE = re.compile(r"instagram\.com/([^/?#]+)")
+_NONALNUM_RE = re.compile(r"[^a-zA-Z0-9]")
+_STOPWORDS_RE = re.compile(r"(the|a|an|and|or|of|in|at|for|llc|inc|co|corp)")
+
+
+class TTLCache:
+    """
+    Small thread-safe in-memory cache whose entries expire after *ttl*
+    seconds. The oldest entries are dropped once *maxsize* is reached.
+    """
+
+    def __init__(self, ttl, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for *key*, or None if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        """Store *value* under *key* for the cache's TTL."""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
 
 def random_delay(min_seconds=1.5, max_seconds=2.5):
     """Sleep for a random duration to avoid rate limiting."""
@@ -16,8 +56,7 @@ def random_delay(min_seconds=1.5, max_seconds=2.5):
 
 def extract_prices(text):
     """Extract price strings from raw text using a dollar-amount regex."""
-    pattern = r"\$\s*\d+(?:,\d{3})*(?:\.\d{2})?"
-    return re.findall(pattern, text)
+    return _PRICE_RE.findall(text)
 
 
 def clean_text(text):
@@ -29,7 +68,7 @@ def clean_text(text):
 
 def extract_instagram_username_from_url(url):
     """Parse an Instagram username out of a profile URL."""
-    match = re.search(r"instagram\.com/([^/?#]+)", url or "")
+    match = _IG_URL_RE.search(url or "")
     if match:
         username = match.group(1).strip("/")
         # Ignore generic paths
@@ -40,10 +79,10 @@ def extract_instagram_username_from_url(url):
 
 def generate_instagram_usernames(business_name):
     """Generate plausible Instagram username candidates from a business name."""
-    base = re.sub(r"[^a-zA-Z0-9]", "", business_name.lower())
+    base = _NONALNUM_RE.sub("", business_name.lower())
     candidates = [base]
     # Try removing common words
-    short = re.sub(r"(the|a|an|and|or|of|in|at|for|llc|inc|co|corp)", "", base)
+    short = _STOPWORDS_RE.sub("", base)
     if short and short != base:
         candidates.append(short)
     # First 20 chars
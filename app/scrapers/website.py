@@ -4,10 +4,47 @@ Enhanced website scraper that extracts design and SEO elements.
 import re
 import logging
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+
+import requests
+from bs4 import BeautifulSoup, Tag
+from requests.adapters import HTTPAdapter
+
+from app.config import Config
+from app.scrapers.browser_pool import block_resources, run_in_browser
+from app.scrapers.utils import TTLCache
+
+try:
+    from playwright.sync_api import TimeoutError as PWTimeout
+    _HAS_PLAYWRIGHT = True
+except ImportError:
+    _HAS_PLAYWRIGHT = False
 
 logger = logging.getLogger(__name__)
 
+# Pages fetched without a browser need at least this much text to be
+# trusted; less usually means the content is rendered by JS
+STATIC_MIN_TEXT_LENGTH = 500
+
+# Empty client-side app mount points (React, Vue, Next.js)
+_SPA_MOUNT_RE = re.compile(rb'<div\s+id=["\'](?:root|app|__next)["\']\s*>\s*</div>', re.I)
+
+# Parsed results of successful scrapes, keyed by URL. Failures aren't
+# cached so they get retried.
+_website_cache = TTLCache(ttl=24 * 3600, maxsize=2000)
+
+# Shared session for the static fetch path so scraping threads reuse
+# keep-alive connections
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_maxsize=Config.ANALYZE_MAX_WORKERS))
+_SESSION.mount("http://", HTTPAdapter(pool_maxsize=Config.ANALYZE_MAX_WORKERS))
+_SESSION.headers.update({
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+})
+
 # Social platform URL patterns for link extraction
 _SOCIAL_PATTERNS = {
     "instagram": re.compile(r"instagram\.com/(?!p/|reel/|explore/)([A-Za-z0-9_.]+)", re.I),
@@ -25,6 +62,39 @@ _PHONE_RE = re.compile(
 # Email pattern
 _EMAIL_RE = re.compile(r"[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}")
 
+# Dollar amounts like $99, $1,500, $49.99
+_PRICE_PATTERN = re.compile(r"\$[\d,]+(?:\.\d{2})?")
+
+# Page text is only collected up to this many (stripped) characters; past
+# that, more text doesn't change how the page is graded
+TEXT_LENGTH_CAP = 200_000
+
+# Items kept per page by the extractors
+MAX_PRICES = 20
+MAX_SERVICES = 20
+MAX_TEAM = 15
+MAX_CTAS = 10
+MAX_IMAGES = 50
+MAX_LINKS = 100
+
+# Professional credentials that mark a team member entry. Short words are
+# matched with a plain character class and looked up in the set, instead of
+# a case-insensitive alternation.
+_CREDENTIAL_TOKEN_RE = re.compile(r"\b([A-Za-z]{2,3})\b")
+_CREDENTIALS = {"md", "dds", "rn", "np", "pa", "dmd", "do"}
+
+# Keywords matched as substrings of lowercased text. Each set is one
+# alternation, so a text is scanned once instead of once per keyword.
+_CTA_KEYWORDS_RE = re.compile(
+    r"book|schedule|appointment|contact|call|reserve|get started|sign up"
+    r"|free consultation|request|order"
+)
+_SERVICE_KEYWORDS_RE = re.compile(r"service|treatment|procedure|offering|specialt")
+_TEAM_KEYWORDS_RE = re.compile(r"team|staff|doctor|dr\.|provider|specialist")
+
+# A URL scheme such as "mailto:" at the start of an href
+_URL_SCHEME_RE = re.compile(r"[A-Za-z][A-Za-z0-9+.\-]*:")
+
 # Simple address heuristic: "123 Main St, City, ST 12345"
 _ADDRESS_RE = re.compile(
     r"\d{1,5}\s+[A-Za-z0-9\s.,#-]{5,60},\s*[A-Za-z\s]{2,30},?\s*[A-Z]{2}\s*\d{5}(?:-\d{4})?",
@@ -42,59 +112,186 @@ def scrape_website(url, timeout=10):
       - images (with alt text), links, has_mobile_viewport
       - cta_buttons, text_length
     """
-    try:
-        from playwright.sync_api import sync_playwright, TimeoutError as PWTimeout
-    except ImportError:
+    data = _website_cache.get(url)
+    if data is not None:
+        return data
+
+    # Most small-business sites are server-rendered; skip the browser for them
+    data = _scrape_static(url, timeout)
+    if data:
+        _website_cache.set(url, data)
+        return data
+
+    if not _HAS_PLAYWRIGHT:
         logger.error("Playwright not installed")
         return _empty_website_data(url)
     
     try:
-        with sync_playwright() as pw:
-            browser = pw.chromium.launch(headless=True)
-            page = browser.new_page()
-            page.set_default_timeout(timeout * 1000)
-            
-            page.goto(url, wait_until="domcontentloaded")
-            page.wait_for_timeout(2000)  # Wait for JS to load
-            
-            html = page.content()
-            browser.close()
-            
-            return _parse_website_content(html, url)
+        html = run_in_browser(_fetch_html, url, timeout)
+        data = _parse_website_content(html, url)
+        _website_cache.set(url, data)
+        return data
             
     except Exception as exc:
         logger.error(f"Error scraping website {url}: {exc}")
         return _empty_website_data(url)
 
 
-def _parse_website_content(html, url):
-    """Parse HTML and extract all relevant data."""
-    soup = BeautifulSoup(html, "html.parser")
+def _scrape_static(url, timeout):
+    """
+    Fetch and parse *url* without a browser.
+
+    Returns the parsed data, or None if the request failed or the page looks
+    client-rendered (little text, or an empty SPA mount point) and needs
+    Playwright.
+    """
+    try:
+        response = _SESSION.get(url, timeout=timeout)
+    except requests.RequestException as exc:
+        logger.debug("Static fetch failed for %s: %s", url, exc)
+        return None
+
+    content_type = response.headers.get("Content-Type", "")
+    if response.status_code != 200 or "html" not in content_type:
+        return None
+
+    # Parse the raw bytes: without a charset in the header, requests would
+    # decode as ISO-8859-1, while the parser honours the page's <meta charset>
+    html = response.content
+    if _SPA_MOUNT_RE.search(html):
+        return None
+
+    encoding = response.encoding if "charset" in content_type.lower() else None
+    data = _parse_website_content(html, url, encoding)
+    if data["text_length"] < STATIC_MIN_TEXT_LENGTH:
+        return None
+    return data
+
+
+def _fetch_html(browser, url, timeout):
+    """Load *url* in a fresh context on a pooled browser and return its HTML."""
+    context = browser.new_context()
+    block_resources(context, ("image", "media", "font", "stylesheet"))
+    try:
+        page = context.new_page()
+        page.set_default_timeout(timeout * 1000)
+        
+        page.goto(url, wait_until="domcontentloaded")
+        # Give JS-rendered content a chance to load, but don't wait on pages
+        # that have already finished
+        if page.evaluate("document.readyState") != "complete":
+            try:
+                page.wait_for_load_state("networkidle", timeout=3000)
+            except PWTimeout:
+                pass
+        
+        return page.content()
+    finally:
+        context.close()
+
+
+def _parse_website_content(html, url, encoding=None):
+    """
+    Parse HTML and extract all relevant data. *html* may be bytes, decoded
+    with *encoding* if given, else by the page's own charset declaration.
+    """
+    soup = BeautifulSoup(html, "lxml", from_encoding=encoding) if encoding else BeautifulSoup(html, "lxml")
+    page = _collect_page(soup)
     
     data = {
         "url": url,
-        "services": _extract_services(soup),
-        "prices": _extract_prices(soup),
-        "team_members": _extract_team(soup),
+        "services": _extract_services(page),
+        "prices": _extract_prices(page),
+        "team_members": _extract_team(page),
         
         # SEO Elements
-        "meta_title": _extract_meta_title(soup),
-        "meta_description": _extract_meta_description(soup),
-        "h1_tags": _extract_h1_tags(soup),
+        "meta_title": _extract_meta_title(page),
+        "meta_description": _extract_meta_description(page),
+        "h1_tags": _extract_h1_tags(page),
         
         # Design Elements
-        "images": _extract_images(soup, url),
-        "links": _extract_links(soup, url),
-        "has_mobile_viewport": _check_mobile_viewport(soup),
-        "cta_buttons": _extract_cta_buttons(soup),
+        "images": _extract_images(page, url),
+        "links": _extract_links(page, url),
+        "has_mobile_viewport": _check_mobile_viewport(page),
+        "cta_buttons": _extract_cta_buttons(page),
         
         # Content Quality
-        "text_length": len(soup.get_text(strip=True)),
+        "text_length": page["text_length"],
     }
     
     return data
 
 
+def _collect_page(soup):
+    """
+    Walk the parsed document once and bucket everything the extractors need,
+    instead of each extractor running its own find_all over the whole tree.
+
+    Tag texts that more than one extractor reads are computed here once.
+    """
+    page = {
+        "title": None,          # first <title>
+        "meta": {},             # first <meta> per name attribute
+        "h1": [],               # (tag, text)
+        "headings": [],         # h2-h4 as (tag, lowercased text)
+        "images": [],           # first MAX_IMAGES <img> tags
+        "anchors": [],          # first MAX_LINKS <a> tags with an href
+        "cta_candidates": [],   # <button>/<a> with a class, as (tag, text)
+        "text": "",             # soup.get_text(), up to TEXT_LENGTH_CAP
+        "text_length": 0,       # len(soup.get_text(strip=True)), capped
+        "tag_texts": {},        # id(tag) -> tag.get_text(strip=True), see _tag_text
+    }
+    string_types = soup.interesting_string_types
+    strings = []
+    length = 0
+
+    for el in soup.descendants:
+        if not isinstance(el, Tag):
+            # Stop keeping strings at the cap so huge pages don't build a
+            # huge text; the walk goes on for the tags
+            if length < TEXT_LENGTH_CAP and type(el) in string_types:
+                strings.append(el)
+                length += len(el.strip())
+            continue
+
+        name = el.name
+        if name == "title":
+            if page["title"] is None:
+                page["title"] = el
+        elif name == "meta":
+            page["meta"].setdefault(el.get("name"), el)
+        elif name == "h1":
+            page["h1"].append((el, el.get_text(strip=True)))
+        elif name in ("h2", "h3", "h4"):
+            page["headings"].append((el, el.get_text(strip=True).lower()))
+        elif name == "img":
+            if len(page["images"]) < MAX_IMAGES:
+                page["images"].append(el)
+
+        if name == "a" and el.get("href") is not None and len(page["anchors"]) < MAX_LINKS:
+            page["anchors"].append(el)
+        if name in ("a", "button") and el.get("class") is not None:
+            page["cta_candidates"].append((el, _tag_text(page, el)))
+
+    page["text"] = "".join(strings)
+    page["text_length"] = min(length, TEXT_LENGTH_CAP)
+    return page
+
+
+def _tag_text(page, tag):
+    """
+    ``tag.get_text(strip=True)``, computed once per tag per page. Service
+    and team sections often overlap, and classed links are both CTA
+    candidates and internal links.
+    """
+    texts = page["tag_texts"]
+    key = id(tag)
+    text = texts.get(key)
+    if text is None:
+        text = texts[key] = tag.get_text(strip=True)
+    return text
+
+
 def extract_brand_info(soup, url):
     """
     Extract brand/contact information from a parsed page.
@@ -155,28 +352,27 @@ def extract_brand_info(soup, url):
     }
 
 
-def _extract_meta_title(soup):
+def _extract_meta_title(page):
     """Extract page title."""
-    title_tag = soup.find("title")
+    title_tag = page["title"]
     return title_tag.get_text(strip=True) if title_tag else ""
 
 
-def _extract_meta_description(soup):
+def _extract_meta_description(page):
     """Extract meta description."""
-    meta = soup.find("meta", attrs={"name": "description"})
+    meta = page["meta"].get("description")
     return meta.get("content", "").strip() if meta else ""
 
 
-def _extract_h1_tags(soup):
+def _extract_h1_tags(page):
     """Extract all H1 tags."""
-    h1_tags = soup.find_all("h1")
-    return [h1.get_text(strip=True) for h1 in h1_tags if h1.get_text(strip=True)]
+    return [text for _, text in page["h1"] if text]
 
 
-def _extract_images(soup, base_url):
+def _extract_images(page, base_url):
     """Extract images with alt text info."""
     images = []
-    for img in soup.find_all("img")[:50]:  # Limit to first 50
+    for img in page["images"]:
         src = img.get("src", "")
         alt = img.get("alt", "").strip()
         
@@ -194,125 +390,145 @@ def _extract_images(soup, base_url):
     return images
 
 
-def _extract_links(soup, base_url):
+def _extract_links(page, base_url):
     """Extract internal links."""
     links = []
     base_domain = urlparse(base_url).netloc
+    # Absolute links to this site start with one of these; prefix checks
+    # avoid a urlparse per link
+    site_prefixes = (f"https://{base_domain}", f"http://{base_domain}")
     
-    for a in soup.find_all("a", href=True)[:100]:  # Limit to first 100
+    for a in page["anchors"]:
         href = a.get("href", "")
-        text = a.get_text(strip=True)
         
         if href:
-            # Convert to absolute URL
-            if not href.startswith("http"):
+            if href.startswith("http"):
+                # Check if internal link: the domain must end right after
+                # the prefix, so example.com.evil.net doesn't count
+                prefix = next((p for p in site_prefixes if href.startswith(p)), None)
+                if prefix is None or href[len(prefix):len(prefix) + 1] not in ("", "/", "?", "#"):
+                    continue
+            elif href.startswith("//") or _URL_SCHEME_RE.match(href):
+                # Protocol-relative or non-http (mailto:, tel:, ...) links
+                href = urljoin(base_url, href)
+                if urlparse(href).netloc != base_domain:
+                    continue
+            else:
+                # Relative path: always on this site
                 href = urljoin(base_url, href)
             
-            # Check if internal link
-            link_domain = urlparse(href).netloc
-            if link_domain == base_domain:
-                links.append({
-                    "url": href,
-                    "text": text
-                })
+            links.append({
+                "url": href,
+                "text": _tag_text(page, a)
+            })
     
     return links
 
 
-def _check_mobile_viewport(soup):
+def _check_mobile_viewport(page):
     """Check if mobile viewport meta tag exists."""
-    viewport = soup.find("meta", attrs={"name": "viewport"})
-    return viewport is not None
+    return "viewport" in page["meta"]
 
 
-def _extract_cta_buttons(soup):
+def _extract_cta_buttons(page):
     """Extract call-to-action buttons/links."""
-    cta_keywords = [
-        "book", "schedule", "appointment", "contact", "call", "reserve",
-        "get started", "sign up", "free consultation", "request", "order"
-    ]
-    
     cta_buttons = []
+    seen = set()
     
     # Check buttons
-    for btn in soup.find_all(["button", "a"], class_=True):
-        text = btn.get_text(strip=True).lower()
-        if any(keyword in text for keyword in cta_keywords):
-            cta_buttons.append(btn.get_text(strip=True))
+    for _, text in page["cta_candidates"]:
+        if text in seen:
+            continue
+        if _CTA_KEYWORDS_RE.search(text.lower()):
+            seen.add(text)
+            cta_buttons.append(text)
+            if len(cta_buttons) == MAX_CTAS:
+                break
     
-    return list(set(cta_buttons))[:10]  # Unique, limit to 10
+    return cta_buttons
 
 
-def _extract_services(soup):
+def _extract_services(page):
     """Extract services from website."""
     services = []
-    
-    # Common service-related keywords
-    service_keywords = [
-        "service", "treatment", "procedure", "offering", "specialt"
-    ]
+    seen = set()
+    scanned = set()
     
     # Look for sections/headings related to services
-    for heading in soup.find_all(["h2", "h3", "h4"]):
-        text = heading.get_text(strip=True).lower()
-        if any(kw in text for kw in service_keywords):
-            # Get nearby list items
+    for heading, text in page["headings"]:
+        if _SERVICE_KEYWORDS_RE.search(text):
+            # Get nearby list items; sibling headings share a parent, which
+            # would only yield items already seen
             parent = heading.find_parent(["section", "div"])
-            if parent:
-                items = parent.find_all(["li", "p", "h4", "h5"])
-                for item in items[:15]:
-                    service_text = item.get_text(strip=True)
-                    if 5 < len(service_text) < 100:
+            if parent and id(parent) not in scanned:
+                scanned.add(id(parent))
+                # limit= stops the search early rather than slicing after
+                for item in parent.find_all(["li", "p", "h4", "h5"], limit=15):
+                    service_text = _tag_text(page, item)
+                    if 5 < len(service_text) < 100 and service_text not in seen:
+                        seen.add(service_text)
                         services.append(service_text)
+                        if len(services) == MAX_SERVICES:
+                            return services
     
-    return list(set(services))[:20]  # Unique, limit to 20
+    return services
 
 
-def _extract_prices(soup):
+def _extract_prices(page):
     """Extract prices from website."""
     prices = []
     
     # Look for price patterns like $99, $1,500, etc.
-    text = soup.get_text()
-    price_pattern = r'\$[\d,]+(?:\.\d{2})?'
+    text = page["text"]
     
-    for match in re.finditer(price_pattern, text):
+    for match in _PRICE_PATTERN.finditer(text):
         # Get context around price (50 chars before and after)
-        start = max(0, match.start() - 50)
-        end = min(len(text), match.end() + 50)
-        context = text[start:end].strip()
-        
         prices.append({
             "price": match.group(),
-            "context": context
+            "context": text[max(0, match.start() - 50):match.end() + 50].strip()
         })
+        if len(prices) == MAX_PRICES:
+            break  # No need to scan the rest of the page
     
-    return prices[:20]  # Limit to 20
+    return prices
 
 
-def _extract_team(soup):
+def _extract_team(page):
     """Extract team members from website."""
     team = []
+    seen = set()
+    scanned = set()
     
     # Look for team/staff sections
-    team_keywords = ["team", "staff", "doctor", "dr.", "provider", "specialist"]
-    
-    for heading in soup.find_all(["h2", "h3", "h4"]):
-        text = heading.get_text(strip=True).lower()
-        if any(kw in text for kw in team_keywords):
+    for heading, text in page["headings"]:
+        if _TEAM_KEYWORDS_RE.search(text):
             parent = heading.find_parent(["section", "div"])
-            if parent:
+            if parent and id(parent) not in scanned:
+                scanned.add(id(parent))
                 # Look for names with titles
                 for elem in parent.find_all(["p", "h4", "h5", "li"]):
-                    member_text = elem.get_text(strip=True)
+                    member_text = _tag_text(page, elem)
+                    if member_text in seen:
+                        continue
                     
                     # Check if it looks like a name + title
-                    if re.search(r'\b(MD|DDS|RN|NP|PA|DMD|DO)\b', member_text, re.I):
-                        team.append(member_text)
-                    elif 5 < len(member_text) < 100 and not member_text.startswith("$"):
+                    if _has_credential(member_text) or (
+                        5 < len(member_text) < 100 and not member_text.startswith("$")
+                    ):
+                        seen.add(member_text)
                         team.append(member_text)
+                        if len(team) == MAX_TEAM:
+                            return team
     
-    return list(set(team))[:15]  # Unique, limit to 15
+    return team
+
+
+def _has_credential(text):
+    """True if *text* contains a credential such as MD or RN as a whole word."""
+    return any(
+        match.group(1).lower() in _CREDENTIALS
+        for match in _CREDENTIAL_TOKEN_RE.finditer(text)
+    )
 
 
 def _empty_website_data(url):
@@ -6,7 +6,16 @@ session = get_session()
 try:
     session.execute(text('ALTER TABLE businesses ADD COLUMN IF NOT EXISTS job_id VARCHAR(50)'))
     session.execute(text('ALTER TABLE businesses ADD COLUMN IF NOT EXISTS position INTEGER'))
+    # revenue_streams used to be TEXT holding a JSON string; the model now
+    # maps it as JSON, which psycopg2 only decodes from a json column
+    session.execute(text(
+        'ALTER TABLE analyses ALTER COLUMN revenue_streams TYPE JSON '
+        "USING NULLIF(revenue_streams::text, '')::json"
+    ))
     session.execute(text('CREATE INDEX IF NOT EXISTS idx_businesses_job_id ON businesses(job_id)'))
+    session.execute(text('CREATE INDEX IF NOT EXISTS ix_businesses_niche_location ON businesses(niche, location)'))
+    session.execute(text('CREATE INDEX IF NOT EXISTS ix_instagram_data_business_id ON instagram_data(business_id)'))
+    session.execute(text('CREATE INDEX IF NOT EXISTS ix_analyses_business_id ON analyses(business_id)'))
     session.commit()
     print("✅ Database migration successful!")
 except Exception as e: